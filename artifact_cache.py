@@ -0,0 +1,96 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+
+CACHE_DIR = '.hurricane_cache'
+SHAPEFILE_SIDECARS = ['.shp', '.shx', '.dbf', '.prj', '.cpg']
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def shapefile_paths(shapefile_path):
+    """List the files making up a shapefile (the .shp and whichever sidecars exist)."""
+    stem, _ = os.path.splitext(shapefile_path)
+    return [stem + ext for ext in SHAPEFILE_SIDECARS if os.path.exists(stem + ext)]
+
+
+def input_digest(paths, version):
+    """
+    Content-address a set of input files.
+    Args:
+        paths (list): Input file paths; their order is part of the key.
+        version (int): Artifact layout version mixed into the key.
+    Returns:
+        str: Short hex key that changes whenever any input's bytes change.
+    """
+    digest = hashlib.sha256(f'v{version}'.encode())
+    for path in paths:
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_path(kind, key, ext='parquet', cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f'{kind}-{key}.{ext}')
+
+
+def prune_artifacts(kind, ext='parquet', keep=2, cache_dir=CACHE_DIR):
+    """
+    Delete all but the most recently written artifacts of one kind.
+    Args:
+        kind (str): Artifact kind, as passed to cache_path.
+        keep (int): Number of newest artifacts left in place.
+    Returns:
+        list: Paths of the removed artifacts.
+    """
+    paths = sorted(glob.glob(os.path.join(cache_dir, f'{kind}-*.{ext}')), key=os.path.getmtime, reverse=True)
+    removed = []
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another process pruned it first
+            continue
+        removed.append(path)
+    return removed
+
+
+def write_parquet_atomic(df, path):
+    """Write a DataFrame to Parquet via a temp file so concurrent workers never read a partial file."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(obj, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def write_npz_atomic(path, **arrays):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    # Pass a file object so numpy does not append '.npz' to the temp name
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def write_text_atomic(text, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -1,17 +1,27 @@
+import functools
+import os
 import pandas as pd
 import geopandas as gpd
+from artifact_cache import cache_path, input_digest, shapefile_paths, write_parquet_atomic
 
 COASTAL_REGIONS = ['Atlantic', 'Gulf of Mexico']
+# Bump whenever the layout of the coastal county store changes
+COUNTY_STORE_VERSION = 1
+COUNTY_STORE_COLUMNS = ['state_county_fips', 'state_name', 'county_name', 'region', 'geometry']
 
-def get_all_coastal_states(excel_path='coastline-counties-list.xlsx'):
+def _read_coastline_excel(excel_path):
     df = pd.read_excel(excel_path, skiprows=3)
     df.columns = [
         'state_county_fips','state_fips','county_fips','county_name','state_name', 'region', 'population'
     ]
     df = df.dropna(subset=['county_fips', 'state_name'])
-    df = df[df['region'].isin(COASTAL_REGIONS)]
-    states = sorted(df['state_name'].str.upper().unique())
-    return states
+    return df[df['region'].isin(COASTAL_REGIONS)]
+
+def _coastal_states(df):
+    return sorted(df['state_name'].str.upper().unique())
+
+def get_all_coastal_states(excel_path='coastline-counties-list.xlsx'):
+    return _coastal_states(_read_coastline_excel(excel_path))
 
 def load_coastal_counties(excel_path='coastline-counties-list.xlsx', coastal_states=None):
     """
@@ -22,22 +32,60 @@ def load_coastal_counties(excel_path='coastline-counties-list.xlsx', coastal_sta
     Returns:
         pd.DataFrame: Filtered coastal counties.
     """
+    # Read the workbook once; the state list is derived from the same rows
+    df = _read_coastline_excel(excel_path)
     if coastal_states is None:
-        coastal_states = get_all_coastal_states(excel_path)
-    df = pd.read_excel(excel_path, skiprows=3)
-    df.columns = [
-        'state_county_fips','state_fips','county_fips','county_name','state_name', 'region', 'population'
-    ]
-    df = df.dropna(subset=['county_fips', 'state_name'])
-    df = df[
-        df['state_name'].str.upper().isin(coastal_states) &
-        df['region'].isin(COASTAL_REGIONS)
-    ]
+        coastal_states = _coastal_states(df)
+    df = df[df['state_name'].str.upper().isin(coastal_states)].copy()
     df['county_fips'] = df['county_fips'].astype(str).str.zfill(3)
     df['state_fips'] = df['state_fips'].astype(str).str.zfill(2)
     df['state_county_fips'] = df['state_county_fips'].astype(str).str.zfill(5)
     return df[['state_name', 'county_name', 'state_county_fips', 'county_fips', 'region']].reset_index(drop=True)
 
+def build_coastal_county_store(
+    shapefile_path='cb_2023_us_county_500k.shp',
+    excel_path='coastline-counties-list.xlsx'
+):
+    """
+    Read only the coastal (Atlantic/Gulf) county polygons out of the national shapefile.
+    Returns a GeoDataFrame in EPSG:4326 with COUNTY_STORE_COLUMNS.
+    """
+    coastal_df = load_coastal_counties(excel_path)
+    # Let OGR skip every other county and every attribute column we do not keep
+    fips_list = ', '.join(f"'{fips}'" for fips in coastal_df['state_county_fips'])
+    gdf = gpd.read_file(shapefile_path, columns=['GEOID'], where=f"GEOID IN ({fips_list})")
+    gdf = gdf.rename(columns={'GEOID': 'state_county_fips'})
+    gdf = gdf.merge(coastal_df, on='state_county_fips', how='left').to_crs('EPSG:4326')
+    return gdf[COUNTY_STORE_COLUMNS]
+
+def coastal_county_store_key(
+    shapefile_path='cb_2023_us_county_500k.shp',
+    excel_path='coastline-counties-list.xlsx'
+):
+    """Content key of the coastal county store; artifacts derived from the store reuse it."""
+    return input_digest([*shapefile_paths(shapefile_path), excel_path], COUNTY_STORE_VERSION)
+
+@functools.lru_cache(maxsize=None)
+def _load_coastal_county_store(shapefile_path, excel_path):
+    path = cache_path('coastal-counties', coastal_county_store_key(shapefile_path, excel_path))
+    if os.path.exists(path):
+        return gpd.read_parquet(path)
+    gdf = build_coastal_county_store(shapefile_path, excel_path)
+    write_parquet_atomic(gdf, path)
+    return gdf
+
+def load_coastal_county_store(
+    shapefile_path='cb_2023_us_county_500k.shp',
+    excel_path='coastline-counties-list.xlsx'
+):
+    """
+    Coastal county polygons from the prebuilt GeoParquet store. The store is built
+    on first use (keyed by the shapefile and Excel contents) and loaded once per process.
+    Returns:
+        GeoDataFrame: FIPS, state, county name, region and geometry (EPSG:4326), a copy safe to modify.
+    """
+    return _load_coastal_county_store(shapefile_path, excel_path).copy()
+
 def load_coastal_county_boundaries(
     shapefile_path='cb_2023_us_county_500k.shp',
     excel_path='coastline-counties-list.xlsx',
@@ -47,16 +95,9 @@ def load_coastal_county_boundaries(
     Load US county boundaries and filter to only coastal counties (Atlantic/Gulf).
     Returns a GeoDataFrame with geometry and county info.
     """
-    # Load all counties
-    gdf = gpd.read_file(shapefile_path)
-    # Load coastal counties list
-    coastal_df = load_coastal_counties(excel_path, coastal_states)
-    # The shapefile uses state and county FIPS codes (STATEFP, COUNTYFP)
-    gdf['state_county_fips'] = gdf['STATEFP'].astype(str).str.zfill(2) + gdf['COUNTYFP'].astype(str).str.zfill(3)
-    # Filter to only coastal counties
-    gdf_coastal = gdf[gdf['state_county_fips'].isin(coastal_df['state_county_fips'])].copy()
-    # Merge in region info
-    gdf_coastal = gdf_coastal.merge(coastal_df, on='state_county_fips', how='left')
+    gdf_coastal = load_coastal_county_store(shapefile_path, excel_path)
+    if coastal_states is not None:
+        gdf_coastal = gdf_coastal[gdf_coastal['state_name'].str.upper().isin(coastal_states)].reset_index(drop=True)
     return gdf_coastal
 
 if __name__ == "__main__":
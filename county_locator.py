@@ -0,0 +1,285 @@
+import functools
+import os
+import time
+import numpy as np
+import pandas as pd
+import shapely
+from artifact_cache import CACHE_DIR, cache_path, write_npz_atomic
+from coastal_county_matcher import coastal_county_store_key, load_coastal_county_boundaries
+
+COUNTY_COLUMNS = ['state_county_fips', 'state_name', 'county_name', 'region']
+# Bump whenever the layout of the persisted county grid changes
+COUNTY_GRID_VERSION = 1
+# Grid cell values besides county indices
+OUTSIDE = -1
+BOUNDARY = -2
+
+
+class CountyLocator:
+    """
+    Point-in-county classifier over the coastal county polygons.
+
+    Owns an STRtree over the prepared county polygons, so it is built once and then
+    classifies any number of raw lat/lon arrays. Points are never turned into shapely
+    objects: they are bucketed into grid cells, one box per occupied cell is queried
+    against the tree, and the exact test runs with shapely.contains_xy on the candidates.
+    """
+
+    def __init__(self, counties, cell_size=0.5):
+        """
+        Args:
+            counties (GeoDataFrame): County polygons in EPSG:4326 with COUNTY_COLUMNS.
+            cell_size (float): Side in degrees of the cells points are bucketed into for the tree query.
+        """
+        self.counties = counties.reset_index(drop=True)
+        self.geometries = np.asarray(self.counties.geometry.values, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+        self.regions = self.counties['region'].to_numpy(dtype=object)
+        self.bounds = shapely.total_bounds(self.geometries)
+        self.cell_size = cell_size
+
+    @classmethod
+    def from_files(cls, shapefile_path='cb_2023_us_county_500k.shp',
+                   excel_path='coastline-counties-list.xlsx', coastal_states=None):
+        return cls(load_coastal_county_boundaries(shapefile_path, excel_path, coastal_states))
+
+    def _candidates(self, latitude, longitude):
+        """(point, county) index pairs whose cell box intersects the county polygon."""
+        min_x, min_y, max_x, max_y = self.bounds
+        inside_bounds = (
+            (longitude >= min_x) & (longitude <= max_x) &
+            (latitude >= min_y) & (latitude <= max_y)
+        )
+        points = np.flatnonzero(inside_bounds)
+        cx = ((longitude[points] - min_x) // self.cell_size).astype(np.int64)
+        cy = ((latitude[points] - min_y) // self.cell_size).astype(np.int64)
+        cell_id = cx * (int((max_y - min_y) // self.cell_size) + 1) + cy
+        order = np.argsort(cell_id, kind='stable')
+        cells, starts, counts = np.unique(cell_id[order], return_index=True, return_counts=True)
+
+        first = order[starts]
+        x0 = min_x + cx[first] * self.cell_size
+        y0 = min_y + cy[first] * self.cell_size
+        boxes = shapely.box(x0, y0, x0 + self.cell_size, y0 + self.cell_size)
+        cell_idx, county_idx = self.tree.query(boxes, predicate='intersects')
+
+        # Expand every (cell, county) pair to all points bucketed in that cell
+        pair_sizes = counts[cell_idx]
+        pair = np.repeat(np.arange(len(cell_idx)), pair_sizes)
+        offset = np.arange(len(pair)) - np.repeat(np.cumsum(pair_sizes) - pair_sizes, pair_sizes)
+        point_idx = points[order[starts[cell_idx][pair] + offset]]
+        return point_idx, county_idx[pair]
+
+    def locate(self, latitude, longitude, chunk_size=1_000_000):
+        """
+        Classify points into coastal counties.
+        Args:
+            latitude (array-like): Latitudes in degrees.
+            longitude (array-like): Longitudes in degrees.
+            chunk_size (int): Points processed per batch, to bound the candidate-pair memory.
+        Returns:
+            tuple: (np.ndarray, np.ndarray) the int32 county index per point (-1 when the point
+                   is in no coastal county) and the region per point (NaN when unmatched).
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        county = np.full(len(latitude), -1, dtype=np.int32)
+        for start in range(0, len(latitude), chunk_size):
+            stop = start + chunk_size
+            lat, lon = latitude[start:stop], longitude[start:stop]
+            point_idx, county_idx = self._candidates(lat, lon)
+            # Strictly inside, like gpd.sjoin(predicate='within')
+            inside = shapely.contains_xy(self.geometries[county_idx], lon[point_idx], lat[point_idx])
+            point_idx, county_idx = point_idx[inside], county_idx[inside]
+            # If polygons overlap, the lowest county index wins (assigned last)
+            by_county = np.argsort(-county_idx, kind='stable')
+            county[start + point_idx[by_county]] = county_idx[by_county]
+        return county, self.region_of(county)
+
+    def region_of(self, county):
+        """Region per county index, NaN for -1."""
+        return np.where(county >= 0, self.regions[county], np.nan)
+
+    def county_columns(self, county):
+        """
+        County attributes for an array of county indices.
+        Returns:
+            pd.DataFrame: COUNTY_COLUMNS as categoricals, one row per index, NaN for -1.
+        """
+        matched = county >= 0
+        columns = {}
+        for column in COUNTY_COLUMNS:
+            # Categorical codes straight from the county index, no string per row
+            codes, categories = pd.factorize(self.counties[column])
+            columns[column] = pd.Categorical.from_codes(np.where(matched, codes[county], -1), categories=categories)
+        return pd.DataFrame(columns)
+
+
+@functools.lru_cache(maxsize=None)
+def get_county_locator(shapefile_path='cb_2023_us_county_500k.shp', excel_path='coastline-counties-list.xlsx'):
+    """Per-process CountyLocator over all Atlantic/Gulf coastal counties."""
+    return CountyLocator.from_files(shapefile_path, excel_path)
+
+
+class CountyGrid:
+    """
+    Raster lookup from lat/lon to coastal county at a fixed resolution.
+
+    Every cell of the grid either lies inside one county (holds its index), outside
+    all coastal counties (OUTSIDE), or crosses a county boundary (BOUNDARY). Points
+    in the first two kinds of cells resolve by array indexing; only points in
+    boundary cells go through the exact CountyLocator test.
+    """
+
+    def __init__(self, locator, grid, origin, resolution):
+        self.locator = locator
+        self.grid = grid
+        self.origin = origin
+        self.resolution = resolution
+
+    @classmethod
+    def build(cls, locator, resolution=0.01, epsilon=1e-9):
+        """
+        Classify the cells with a quadtree over the county bounds: a block that touches
+        no county, or lies strictly inside the only county it touches, is filled at once,
+        every other block is split in four until it is a single BOUNDARY cell.
+        Args:
+            locator (CountyLocator): Polygons the grid indexes into.
+            resolution (float): Cell side in degrees.
+            epsilon (float): Degrees each block is grown by before it is tested, so points
+                             rounded into a neighbouring cell are still classified correctly.
+        """
+        min_x, min_y, max_x, max_y = locator.bounds
+        nx = int((max_x - min_x) // resolution) + 1
+        ny = int((max_y - min_y) // resolution) + 1
+        grid = np.full((ny, nx), OUTSIDE, dtype=np.int16)
+
+        size = 1 << int(np.ceil(np.log2(max(nx, ny))))
+        ix, iy = np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)
+        while len(ix):
+            x0, y0 = min_x + ix * resolution, min_y + iy * resolution
+            boxes = shapely.box(x0 - epsilon, y0 - epsilon,
+                                x0 + size * resolution + epsilon, y0 + size * resolution + epsilon)
+            block_idx, county_idx = locator.tree.query(boxes, predicate='intersects')
+            hits = np.bincount(block_idx, minlength=len(ix))
+
+            single = hits[block_idx] == 1
+            block_idx, county_idx = block_idx[single], county_idx[single]
+            inside = shapely.contains_properly(locator.geometries[county_idx], boxes[block_idx])
+            for b, county in zip(block_idx[inside], county_idx[inside]):
+                grid[iy[b]:iy[b] + size, ix[b]:ix[b] + size] = county
+
+            mixed = hits > 0
+            mixed[block_idx[inside]] = False
+            if size == 1:
+                grid[iy[mixed], ix[mixed]] = BOUNDARY
+                break
+            size //= 2
+            ix = (ix[mixed, None] + np.array([0, size, 0, size])).ravel()
+            iy = (iy[mixed, None] + np.array([0, 0, size, size])).ravel()
+            in_grid = (ix < nx) & (iy < ny)
+            ix, iy = ix[in_grid], iy[in_grid]
+        return cls(locator, grid, np.array([min_x, min_y]), resolution)
+
+    def save(self, path):
+        write_npz_atomic(path, grid=self.grid, origin=self.origin, resolution=self.resolution)
+
+    @classmethod
+    def load(cls, path, locator):
+        with np.load(path) as data:
+            return cls(locator, data['grid'], data['origin'], float(data['resolution']))
+
+    def cells(self, latitude, longitude):
+        """
+        Grid value of the cell of every point, without resolving boundary cells.
+        Returns:
+            np.ndarray: int32 county index, OUTSIDE or BOUNDARY per point.
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        ix = np.floor((longitude - self.origin[0]) / self.resolution)
+        iy = np.floor((latitude - self.origin[1]) / self.resolution)
+        ny, nx = self.grid.shape
+        # NaN coordinates compare False and stay OUTSIDE
+        in_grid = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        county = np.full(len(latitude), OUTSIDE, dtype=np.int32)
+        county[in_grid] = self.grid[iy[in_grid].astype(np.int64), ix[in_grid].astype(np.int64)]
+        return county
+
+    def locate(self, latitude, longitude):
+        """
+        Classify points into coastal counties; same result as CountyLocator.locate.
+        Returns:
+            tuple: (np.ndarray, np.ndarray) int32 county index per point (-1 when unmatched)
+                   and region per point (NaN when unmatched).
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        county = self.cells(latitude, longitude)
+        boundary = np.flatnonzero(county == BOUNDARY)
+        county[boundary], _ = self.locator.locate(latitude[boundary], longitude[boundary])
+        return county, self.locator.region_of(county)
+
+
+@functools.lru_cache(maxsize=None)
+def get_county_grid(shapefile_path='cb_2023_us_county_500k.shp', excel_path='coastline-counties-list.xlsx',
+                    resolution=0.01, cache_dir=CACHE_DIR):
+    """
+    Per-process CountyGrid over all Atlantic/Gulf coastal counties. The grid is
+    persisted next to the county store, keyed by the store contents and the resolution.
+    """
+    locator = get_county_locator(shapefile_path, excel_path)
+    key = f'{coastal_county_store_key(shapefile_path, excel_path)}-{resolution:g}-v{COUNTY_GRID_VERSION}'
+    path = cache_path('county-grid', key, ext='npz', cache_dir=cache_dir)
+    if os.path.exists(path):
+        return CountyGrid.load(path, locator)
+    county_grid = CountyGrid.build(locator, resolution)
+    county_grid.save(path)
+    return county_grid
+
+
+if __name__ == "__main__":
+    import geopandas as gpd
+    from hurdat2_reader import read_hurdat2
+    locator = get_county_locator()
+    start = time.perf_counter()
+    county_grid = CountyGrid.build(locator)
+    build_seconds = time.perf_counter() - start
+    boundary_share = (county_grid.grid == BOUNDARY).mean()
+    print(f"grid {county_grid.grid.shape} at {county_grid.resolution} deg built in {build_seconds:.2f}s, "
+          f"{boundary_share:.1%} boundary cells")
+
+    # Random points around the counties, points on cell edges, county vertices,
+    # midpoints of county edges and the real track fixes
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    min_x, min_y, max_x, max_y = locator.bounds
+    edges = county_grid.origin + county_grid.resolution * rng.integers(0, 3000, (100_000, 2))
+    vertices = shapely.get_coordinates(locator.geometries)
+    picked = rng.choice(len(vertices) - 1, min(100_000, len(vertices) - 1), replace=False)
+    midpoints = (vertices[picked] + vertices[picked + 1]) / 2
+    fixes = read_hurdat2()
+    lat = np.concatenate([rng.uniform(min_y - 5, max_y + 5, n), edges[:, 1], vertices[picked, 1], midpoints[:, 1],
+                          fixes['latitude']])
+    lon = np.concatenate([rng.uniform(min_x - 5, max_x + 5, n), edges[:, 0], vertices[picked, 0], midpoints[:, 0],
+                          fixes['longitude']])
+
+    timings = {}
+    results = {}
+    for label, lookup in [('CountyLocator.locate', locator), ('CountyGrid.locate', county_grid)]:
+        start = time.perf_counter()
+        results[label], _ = lookup.locate(lat, lon)
+        timings[label] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lon, lat), crs='EPSG:4326')
+    joined = gpd.sjoin(points, locator.counties, how='left', predicate='within')
+    timings['gpd.sjoin'] = time.perf_counter() - start
+    expected = joined.groupby(level=0)['index_right'].min().fillna(-1).astype(int).to_numpy()
+
+    print(f"{len(lat)} points, {(expected >= 0).sum()} in a coastal county")
+    for label, seconds in timings.items():
+        print(f"{label:<21} {seconds:.2f}s")
+    for label, county in results.items():
+        assert np.array_equal(county, expected), label
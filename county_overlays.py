@@ -0,0 +1,154 @@
+import functools
+import os
+import time
+import folium
+import numpy as np
+import shapely
+from jinja2 import Template
+from artifact_cache import CACHE_DIR, cache_path, write_text_atomic
+from coastal_county_matcher import COASTAL_REGIONS, coastal_county_store_key, load_coastal_county_store
+
+# Simplification tolerance (degrees) and coordinate decimals of each level of detail
+COUNTY_TIERS = {
+    'coarse': (0.02, 3),
+    'medium': (0.005, 4),
+    'fine': (0.001, 5),
+    'full': (None, None),
+}
+# Regions offered by the pages and the coastline regions they draw
+OVERLAY_REGIONS = {
+    'Atlantic': ['Atlantic'],
+    'Gulf of Mexico': ['Gulf of Mexico'],
+    'Any': COASTAL_REGIONS,
+    'Both': COASTAL_REGIONS,
+}
+REGION_COLORS = {'Atlantic': 'blue', 'Gulf of Mexico': 'green', 'Both': 'purple', 'Any': 'blue'}
+OVERLAY_PROPERTIES = ['state_name', 'county_name', 'region']
+# Bump whenever the simplification or the serialized layout changes
+OVERLAY_VERSION = 1
+
+
+def simplify_coverage(geometries, tolerance):
+    """
+    Simplify county polygons as one coverage, so neighbouring counties keep their shared
+    borders (no gaps or slivers). Falls back to per-polygon topology-preserving simplification
+    when GEOS is older than 3.12 or the polygons are not a clean coverage.
+    """
+    if hasattr(shapely, 'coverage_simplify') and shapely.geos_version >= (3, 12, 0):
+        try:
+            return shapely.coverage_simplify(geometries, tolerance)
+        except shapely.errors.GEOSException:
+            pass
+    return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+@functools.lru_cache(maxsize=None)
+def county_tier(tier, shapefile_path='cb_2023_us_county_500k.shp', excel_path='coastline-counties-list.xlsx'):
+    """
+    Coastal counties simplified to one level of detail of COUNTY_TIERS ('full' keeps the store geometry).
+    Returns:
+        GeoDataFrame: OVERLAY_PROPERTIES and the simplified geometry, rounded to the tier's decimals.
+    """
+    tolerance, decimals = COUNTY_TIERS[tier]
+    gdf = load_coastal_county_store(shapefile_path, excel_path)
+    geometries = gdf.geometry.values
+    if tolerance is not None:
+        geometries = simplify_coverage(geometries, tolerance)
+        geometries = shapely.transform(geometries, lambda coords: np.round(coords, decimals))
+    return gdf[OVERLAY_PROPERTIES].set_geometry(geometries, crs=gdf.crs)
+
+
+@functools.lru_cache(maxsize=None)
+def county_geojson(region='Any', tier='medium', shapefile_path='cb_2023_us_county_500k.shp',
+                   excel_path='coastline-counties-list.xlsx', cache_dir=CACHE_DIR):
+    """
+    Serialized GeoJSON FeatureCollection of the coastal counties of a region at one level
+    of detail. Strings are cached on disk per region and tier (keyed by the county store)
+    and kept in memory for the life of the process.
+    Args:
+        region (str): Key of OVERLAY_REGIONS.
+        tier (str): Key of COUNTY_TIERS.
+    Returns:
+        str: GeoJSON text, ready to hand to folium.GeoJson.
+    """
+    key = f"{coastal_county_store_key(shapefile_path, excel_path)}-{tier}-{region.replace(' ', '_')}-v{OVERLAY_VERSION}"
+    path = cache_path('county-geojson', key, ext='json', cache_dir=cache_dir)
+    if os.path.exists(path):
+        with open(path) as f:
+            return f.read()
+    gdf = county_tier(tier, shapefile_path, excel_path)
+    geojson = gdf[gdf['region'].isin(OVERLAY_REGIONS[region])].to_json(drop_id=True)
+    write_text_atomic(geojson, path)
+    return geojson
+
+
+class CountyOverlay(folium.MacroElement):
+    """
+    Map layer drawing a pre-serialized GeoJSON string as-is. Unlike folium.GeoJson,
+    the string is neither parsed nor re-serialized when the map is rendered.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJson({{ this.geojson }}, {
+                style: function() { return {{ this.style|tojson }}; }
+            }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, geojson, color='blue'):
+        super().__init__()
+        self._name = 'CountyOverlay'
+        # A '</' in a county name would close the inline <script> early
+        self.geojson = geojson.replace('</', '<\\/')
+        self.style = {'color': color, 'fillColor': color, 'weight': 2, 'fillOpacity': 0.15}
+
+
+def overlay_counties(m, region, tier='medium'):
+    """
+    Draw the coastal counties of a region on a folium map. The GeoJSON is serialized
+    once per process (see county_geojson), so a filter change does not touch county data.
+    Args:
+        m (folium.Map): Map to draw on.
+        region (str): 'Any', 'Atlantic', 'Gulf of Mexico' or 'Both'.
+        tier (str): Level of detail, a key of COUNTY_TIERS.
+    """
+    CountyOverlay(county_geojson(region, tier), REGION_COLORS.get(region, 'blue')).add_to(m)
+
+
+if __name__ == "__main__":
+    # Names cannot end the map's <script> block
+    hostile = '{"type":"FeatureCollection","features":[{"type":"Feature","geometry":null,"properties":{"county_name":"</script><b>x"}}]}'
+    m = folium.Map()
+    CountyOverlay(hostile).add_to(m)
+    assert '</script><b>' not in m.get_root().render()
+
+    full = load_coastal_county_store()
+    full_bytes = len(full.to_json(drop_id=True))
+    print(f"full resolution: {full_bytes / 2**20:.2f} MiB, {shapely.get_num_coordinates(full.geometry.values).sum()} vertices")
+    for tier in COUNTY_TIERS:
+        start = time.perf_counter()
+        gdf = county_tier(tier)
+        seconds = time.perf_counter() - start
+        vertices = shapely.get_num_coordinates(gdf.geometry.values).sum()
+        sizes = {region: len(county_geojson(region, tier)) for region in OVERLAY_REGIONS}
+        print(f"{tier:>6}: {vertices} vertices, built in {seconds:.2f}s, " +
+              ", ".join(f"{region} {size / 2**10:.0f} KiB" for region, size in sizes.items()) +
+              f" ({full_bytes / sizes['Any']:.1f}x smaller than full)")
+
+    # Rendering all four overlays: re-read + re-serialize per render vs. the cached layer strings
+    from coastal_county_matcher import load_coastal_county_boundaries
+    timings = {}
+    for label in ['folium.GeoJson(gdf)', 'overlay_counties']:
+        start = time.perf_counter()
+        for region in OVERLAY_REGIONS:
+            m = folium.Map(location=[30, -80], zoom_start=4)
+            if label == 'overlay_counties':
+                overlay_counties(m, region, tier='full')
+            else:
+                gdf = load_coastal_county_boundaries()
+                gdf = gdf[gdf['region'].isin(OVERLAY_REGIONS[region])]
+                folium.GeoJson(gdf, style_function=lambda x: {'color': 'blue'}).add_to(m)
+            m.get_root().render()
+        timings[label] = time.perf_counter() - start
+    print(", ".join(f"{label}: {seconds * 1000:.0f} ms" for label, seconds in timings.items()),
+          "for the four regions at full resolution")
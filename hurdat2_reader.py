@@ -0,0 +1,239 @@
+import hashlib
+import os
+import time
+import numpy as np
+import pandas as pd
+
+HURDAT2_FILE = "hurdat2-1851-2024-040425.txt"
+
+# HURDAT2 data lines are fixed-width (see the NHC "HURDAT2 format" description),
+# so every field can be sliced out of a 2D byte array by column offsets.
+_DATE = (0, 8)
+_TIME = (10, 14)
+_RECORD_IDENTIFIER = 16
+_STATUS = (19, 21)
+_LATITUDE = (23, 27)
+_LATITUDE_HEMISPHERE = 27
+_LONGITUDE = (30, 35)
+_LONGITUDE_HEMISPHERE = 35
+_WIND = (38, 41)
+_PRESSURE = (43, 47)
+_RADII_START = 48
+_RADII_STEP = 6
+_SEPARATORS = [8, 14, 17, 21, 28, 36, 41, 47]
+
+# Wind radii (nautical miles) per quadrant for the 34, 50 and 64 kt thresholds
+RADII_COLUMNS = [
+    'ne34', 'se34', 'sw34', 'nw34',
+    'ne50', 'se50', 'sw50', 'nw50',
+    'ne64', 'se64', 'sw64', 'nw64',
+]
+RADII_THRESHOLDS = [34] * 4 + [50] * 4 + [64] * 4
+MISSING = -999
+
+
+def _parse_int(buf, start, stop):
+    """
+    Parse a right-justified integer field from every row of a byte matrix.
+    Spaces and decimal points are skipped, a '-' anywhere in the field makes it negative.
+    """
+    field = buf[:, start:stop]
+    value = np.zeros(len(buf), dtype=np.int32)
+    for j in range(stop - start):
+        digit = field[:, j].astype(np.int32) - ord('0')
+        is_digit = (digit >= 0) & (digit <= 9)
+        value = np.where(is_digit, value * 10 + digit, value)
+    negative = (field == ord('-')).any(axis=1)
+    return np.where(negative, -value, value)
+
+
+def _parse_str(buf, start, stop):
+    """Slice a fixed-width text field out of a byte matrix as a unicode array."""
+    field = np.ascontiguousarray(buf[:, start:stop])
+    return field.view(f'S{stop - start}').ravel().astype(f'U{stop - start}')
+
+
+def _split_lines(raw):
+    lines = [line for line in raw.splitlines() if line.strip()]
+    width = max(len(line) for line in lines)
+    buf = np.array(lines, dtype=f'S{width}').view(np.uint8).reshape(len(lines), width)
+    return lines, buf
+
+
+def _read_lines(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    lines, buf = _split_lines(raw)
+    # Header lines start with the basin letters of the ATCF id, data lines with a digit
+    is_header = buf[:, 0] >= ord('A')
+    return lines, buf, is_header
+
+
+def storm_content_digests(path=HURDAT2_FILE):
+    """
+    Hash every storm block (header line plus its data lines) of a HURDAT2 file.
+
+    Args:
+        path (str): Path to the HURDAT2 file.
+    Returns:
+        dict: ATCF storm id -> SHA-1 hex digest of the storm's lines, in file order.
+    """
+    lines, _, is_header = _read_lines(path)
+    starts = np.append(np.flatnonzero(is_header), len(lines))
+    digests = {}
+    for start, stop in zip(starts[:-1], starts[1:]):
+        storm_id = lines[start].split(b',')[0].strip().decode()
+        digests[storm_id] = hashlib.sha1(b'\n'.join(lines[start:stop])).hexdigest()
+    return digests
+
+
+def read_hurdat2(path=HURDAT2_FILE, storm_ids=None):
+    """
+    Parse a HURDAT2 text file straight into typed NumPy columns.
+
+    Args:
+        path (str): Path to the HURDAT2 file.
+        storm_ids (iterable or None): ATCF ids of the storms to parse. If None, parses every storm.
+    Returns:
+        dict: One array per column, one row per track fix:
+            'storm_index' (int32), 'storm_id', 'name', 'year' (int16),
+            'timestamp' (datetime64[s]), 'date' ('YYYYMMDD'), 'time' ('HHMM'),
+            'record_identifier', 'status', 'latitude', 'longitude' (float64),
+            'wind' (int16, knots), 'pressure' (float32, mb, NaN if missing)
+            and one float32 column per entry of RADII_COLUMNS (nautical miles).
+    """
+    lines, buf, is_header = _read_lines(path)
+    if storm_ids is not None:
+        # Drop the blocks of every other storm before any field is parsed
+        header_rows = np.flatnonzero(is_header)
+        block_ids = np.array([lines[i].split(b',')[0].strip().decode() for i in header_rows])
+        keep_block = np.isin(block_ids, list(storm_ids))
+        keep = keep_block[np.cumsum(is_header) - 1]
+        lines = [lines[i] for i in np.flatnonzero(keep)]
+        buf, is_header = buf[keep], is_header[keep]
+
+    header_lines = [lines[i] for i in np.flatnonzero(is_header)]
+    headers = [line.decode().split(',') for line in header_lines]
+    header_ids = np.array([h[0].strip() for h in headers])
+    storm_names = np.array([h[1].strip() for h in headers])
+    storm_years = np.array([int(h[0].strip()[4:]) for h in headers], dtype=np.int16)
+
+    data = buf[~is_header]
+    if not (data[:, _SEPARATORS] == ord(',')).all():
+        raise ValueError(f"{path} does not look like a fixed-width HURDAT2 file.")
+    storm_index = (np.cumsum(is_header)[~is_header] - 1).astype(np.int32)
+
+    year = _parse_int(data, 0, 4)
+    month = _parse_int(data, 4, 6)
+    day = _parse_int(data, 6, 8)
+    minutes = _parse_int(data, 10, 12) * 60 + _parse_int(data, 12, 14)
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    timestamp = (
+        months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    ).astype('datetime64[s]') + (minutes * 60).astype('timedelta64[s]')
+
+    latitude = _parse_int(data, *_LATITUDE) / 10
+    latitude[data[:, _LATITUDE_HEMISPHERE] == ord('S')] *= -1
+    longitude = _parse_int(data, *_LONGITUDE) / 10
+    longitude[data[:, _LONGITUDE_HEMISPHERE] == ord('W')] *= -1
+
+    wind = _parse_int(data, *_WIND).astype(np.int16)
+    pressure = _parse_int(data, *_PRESSURE).astype(np.float32)
+    pressure[pressure == MISSING] = np.nan
+
+    record_identifier = _parse_str(data, _RECORD_IDENTIFIER, _RECORD_IDENTIFIER + 1)
+    record_identifier[record_identifier == ' '] = ''
+
+    columns = {
+        'storm_index': storm_index,
+        'storm_id': header_ids[storm_index],
+        'name': storm_names[storm_index],
+        'year': storm_years[storm_index],
+        'timestamp': timestamp,
+        'date': _parse_str(data, *_DATE),
+        'time': _parse_str(data, *_TIME),
+        'record_identifier': record_identifier,
+        'status': _parse_str(data, *_STATUS),
+        'latitude': latitude,
+        'longitude': longitude,
+        'wind': wind,
+        'pressure': pressure,
+    }
+    for k, (column, threshold) in enumerate(zip(RADII_COLUMNS, RADII_THRESHOLDS)):
+        start = _RADII_START + k * _RADII_STEP
+        radius = _parse_int(data, start, start + 5).astype(np.float32)
+        # Like hurdat2parser: a missing radius is 0 when the storm is below the threshold
+        missing = radius == MISSING
+        radius[missing] = np.where(wind[missing] < threshold, 0, np.nan)
+        columns[column] = radius
+    return columns
+
+
+def hurdat2_to_dataframe(columns):
+    """
+    Build the track DataFrame produced by hurricane_app.process_hurricane_data.
+
+    Args:
+        columns (dict): Output of read_hurdat2.
+    Returns:
+        pd.DataFrame: One row per fix with 'storm_id', 'name', 'date', 'time', 'status',
+                      'latitude', 'longitude', 'wind_speed' and 'year' columns.
+    """
+    # Use storm ID as name for unnamed hurricanes
+    name = np.where(columns['name'] == 'UNNAMED', columns['storm_id'], columns['name'])
+    return pd.DataFrame({
+        'storm_id': columns['storm_id'],
+        'name': name,
+        'date': columns['date'],
+        'time': columns['time'],
+        'status': columns['status'],
+        'latitude': columns['latitude'],
+        'longitude': columns['longitude'],
+        'wind_speed': columns['wind'].astype(np.int64),
+        'year': columns['year'].astype(np.int64),
+    })
+
+
+def _process_with_hurdat2parser(path):
+    """The original per-entry dict loop over a hurdat2parser.Hurdat2 object (benchmark baseline)."""
+    from hurdat2parser import Hurdat2
+    parser = Hurdat2(path)
+    records = []
+    for storm in parser.tc.values():
+        storm_name = storm.atcfid if storm.name == "UNNAMED" else storm.name
+        for entry in storm.entry:
+            records.append({
+                'storm_id': storm.atcfid,
+                'name': storm_name,
+                'date': entry.date.strftime('%Y%m%d'),
+                'time': entry.time.strftime('%H%M'),
+                'status': entry.status,
+                'latitude': entry.latitude,
+                'longitude': entry.longitude,
+                'wind_speed': entry.wind,
+                'year': storm.year
+            })
+    return pd.DataFrame(records)
+
+
+def benchmark(path=HURDAT2_FILE):
+    """
+    Time the columnar reader against the hurdat2parser path on the same file
+    and check that both produce the same DataFrame.
+    """
+    start = time.perf_counter()
+    expected = _process_with_hurdat2parser(path)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = hurdat2_to_dataframe(read_hurdat2(path))
+    columnar_seconds = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    print(f"{len(result)} fixes from {os.path.basename(path)}")
+    print(f"hurdat2parser loop: {legacy_seconds:.3f}s")
+    print(f"columnar reader:    {columnar_seconds:.3f}s ({legacy_seconds / columnar_seconds:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -2,45 +2,27 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import folium
-from streamlit_folium import folium_static
 from geopy.geocoders import Nominatim
 import os
 from datetime import datetime
-from hurdat2parser import Hurdat2
+from hurdat2_reader import HURDAT2_FILE, read_hurdat2, hurdat2_to_dataframe
 import random
 import plotly.express as px
-from hurricane_county_matcher import match_hurricane_points_to_counties
+from track_cache import load_joined_points
+from track_schema import categorize_wind
+from track_map import plot_hurricane_paths
+from map_cache import map_cache_key, show_cached_map
 
 def process_hurricane_data():
     # Use the local HURDAT2 file directly
-    data_file = "hurdat2-1851-2024-040425.txt"
+    data_file = HURDAT2_FILE
     
     if not os.path.exists(data_file):
         st.error(f"Error: {data_file} not found. Please download the HURDAT2 file from https://www.nhc.noaa.gov/data/#hurdat and place it in the same directory as this script.")
         return None
     
-    # Parse the data using Hurdat2
-    parser = Hurdat2(data_file)
-    
-    # Convert to DataFrame
-    records = []
-    for storm in parser.tc.values():
-        # Use storm ID as name for unnamed hurricanes
-        storm_name = storm.atcfid if storm.name == "UNNAMED" else storm.name
-        for entry in storm.entry:
-            records.append({
-                'storm_id': storm.atcfid,
-                'name': storm_name,
-                'date': entry.date.strftime('%Y%m%d'),
-                'time': entry.time.strftime('%H%M'),
-                'status': entry.status,
-                'latitude': entry.latitude,
-                'longitude': entry.longitude,
-                'wind_speed': entry.wind,
-                'year': storm.year
-            })
-    
-    return pd.DataFrame(records)
+    # Parse the fixed-width file straight into typed columns
+    return hurdat2_to_dataframe(read_hurdat2(data_file))
 
 # Function to determine hurricane category based on wind speed
 def get_hurricane_category(wind_speed):
@@ -57,16 +39,6 @@ def get_hurricane_category(wind_speed):
     else:
         return 0
 
-# Category color map
-CATEGORY_COLORS = {
-    0: 'gray',    # Tropical Depression/Storm
-    1: 'blue',   # Category 1
-    2: 'green',  # Category 2
-    3: 'yellow', # Category 3
-    4: 'orange', # Category 4
-    5: 'red',    # Category 5
-}
-
 # For all-hurricane mode, assign a unique color per hurricane
 PALETTE = [
     'red', 'blue', 'green', 'orange', 'purple', 'brown', 'pink', 'black', 'cyan', 'magenta',
@@ -75,15 +47,8 @@ PALETTE = [
 
 @st.cache_data(show_spinner=True)
 def get_hurricane_points_with_county():
-    df = process_hurricane_data()
-    df['category'] = df['wind_speed'].apply(get_hurricane_category)
-    df['hurricane_id'] = df['name'] + ' (' + df['year'].astype(str) + ')'
-    # Only keep necessary columns for join
-    join_cols = ['hurricane_id', 'name', 'year', 'date', 'time', 'latitude', 'longitude', 'category', 'wind_speed']
-    df = df[join_cols]
-    # Spatial join
-    joined = match_hurricane_points_to_counties(df)
-    return joined
+    # Parse + spatial join, served from the on-disk cache unless an input file changed
+    return load_joined_points()
 
 def hurricane_map_page(df):
     st.title("Atlantic Hurricane Paths Visualization")
@@ -100,7 +65,7 @@ def hurricane_map_page(df):
     selected_region = st.sidebar.selectbox("Show hurricanes that crossed:", region_options, index=0)
     
     # Determine hurricanes that crossed each region
-    hurricane_region_map = df.groupby('hurricane_id')['region'].agg(lambda x: set(x.dropna())).to_dict()
+    hurricane_region_map = df.groupby('hurricane_id', observed=True)['region'].apply(lambda x: set(x.dropna())).to_dict()
     
     # Filtering logic
     if selected_region == 'Any':
@@ -125,35 +90,17 @@ def hurricane_map_page(df):
     
     # Create map
     if not filtered_df.empty:
-        center_lat = filtered_df['latitude'].mean()
-        center_lon = filtered_df['longitude'].mean()
-        m = folium.Map(location=[center_lat, center_lon], zoom_start=4)
-        
-        storm_df = filtered_df.sort_values(['date', 'time'])
-        path_points = storm_df[['latitude', 'longitude', 'category', 'name', 'date']].values
-        for i in range(len(path_points) - 1):
-            latlon1 = (path_points[i][0], path_points[i][1])
-            latlon2 = (path_points[i+1][0], path_points[i+1][1])
-            cat = int(path_points[i][2])
-            name = path_points[i][3]
-            date = path_points[i][4]
-            folium.PolyLine(
-                [latlon1, latlon2],
-                color=CATEGORY_COLORS.get(cat, 'black'),
-                weight=4,
-                opacity=0.8,
-                tooltip=f"{name} | Cat {cat} | {date}"
-            ).add_to(m)
-        folium.Marker(
-            (path_points[0][0], path_points[0][1]),
-            popup=f"Start: {name} ({path_points[0][4]})"
-        ).add_to(m)
-        folium.Marker(
-            (path_points[-1][0], path_points[-1][1]),
-            popup=f"End: {name} ({path_points[-1][4]})"
-        ).add_to(m)
+        def build_map():
+            center_lat = filtered_df['latitude'].mean()
+            center_lon = filtered_df['longitude'].mean()
+            m = folium.Map(location=[center_lat, center_lon], zoom_start=4)
+            
+            plot_hurricane_paths(m, filtered_df, [selected_hurricane])
+            return m
         
-        folium_static(m)
+        # Rendered once per storm and dataset version, then served from the map cache
+        show_cached_map(map_cache_key('hurricane_map', df.attrs.get('dataset_version'),
+                                      year=selected_year, hurricane=selected_hurricane), build_map)
         
         # Add legend
         legend_html = '''<div style="position: fixed; 
@@ -177,7 +124,7 @@ def hurricane_map_page(df):
         st.subheader("Hurricane Statistics")
         st.write(f"Hurricane: {selected_hurricane}")
         st.write(f"Maximum wind speed: {filtered_df['wind_speed'].max()} knots")
-        st.write(f"Duration: {filtered_df['date'].min()} to {filtered_df['date'].max()}")
+        st.write(f"Duration: {filtered_df['timestamp'].min():%Y-%m-%d} to {filtered_df['timestamp'].max():%Y-%m-%d}")
         
         # Display raw data
         st.subheader("Raw Data")
@@ -242,7 +189,7 @@ def main():
     else:
         # For the frequency page, use the original process_hurricane_data
         df = process_hurricane_data()
-        df['category'] = df['wind_speed'].apply(get_hurricane_category)
+        df['category'] = categorize_wind(df['wind_speed'])
         df['hurricane_id'] = df['name'] + ' (' + df['year'].astype(str) + ')'
         hurricane_weekly_frequency_page(df)
 
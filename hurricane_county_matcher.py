@@ -1,12 +1,88 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import geopandas as gpd
 import pandas as pd
-from shapely.geometry import Point
 from coastal_county_matcher import load_coastal_county_boundaries
+from county_locator import BOUNDARY, get_county_grid
 
-def match_hurricane_points_to_counties(hurricane_df, 
+def points_in_envelopes(longitude, latitude, bounds):
+    """
+    Flag the points lying inside at least one bounding box.
+    Args:
+        longitude (np.ndarray): Point longitudes.
+        latitude (np.ndarray): Point latitudes.
+        bounds (np.ndarray): (n, 4) array of minx, miny, maxx, maxy boxes.
+    Returns:
+        np.ndarray: Boolean mask over the points.
+    """
+    inside = np.zeros(len(longitude), dtype=bool)
+    # Sort once by longitude so each box only looks at the points in its x range
+    order = np.argsort(longitude, kind='stable')
+    sorted_x = longitude[order]
+    lo = np.searchsorted(sorted_x, bounds[:, 0], side='left')
+    hi = np.searchsorted(sorted_x, bounds[:, 2], side='right')
+    for (_, min_y, _, max_y), start, stop in zip(bounds, lo, hi):
+        candidates = order[start:stop]
+        y = latitude[candidates]
+        inside[candidates[(y >= min_y) & (y <= max_y)]] = True
+    return inside
+
+# County polygons of a join worker process, set once by _init_join_worker
+_worker_counties = None
+
+def _init_join_worker(counties):
+    global _worker_counties
+    _worker_counties = counties
+
+def _join_chunk(longitude, latitude, counties=None):
+    """
+    Join one chunk of points to the county polygons.
+    Returns:
+        tuple: (np.ndarray, np.ndarray) chunk positions of the matched points and
+               positions of the counties they fall within.
+    """
+    counties = _worker_counties if counties is None else counties
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(longitude, latitude), crs=counties.crs)
+    pairs = gpd.sjoin(points, counties, how='inner', predicate='within')
+    return pairs.index.to_numpy(), pairs['index_right'].to_numpy()
+
+def _join_points(longitude, latitude, counties, workers=1, chunk_size=100_000):
+    """
+    Run the join over chunks of points, on a process pool when workers > 1.
+    Returns:
+        tuple: (np.ndarray, np.ndarray) point and county positions of every match.
+    """
+    if not len(longitude):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    # Fewer points than one chunk are not worth starting a pool for
+    if len(longitude) <= chunk_size:
+        workers = 1
+    n_chunks = max(-(-len(longitude) // chunk_size), workers)
+    bounds = np.linspace(0, len(longitude), n_chunks + 1).astype(np.int64)
+    lon_chunks = [longitude[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    lat_chunks = [latitude[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    if workers > 1:
+        # Workers get the county polygons once, through the initializer, not with every chunk
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_join_worker,
+                                 initargs=(counties,)) as executor:
+            results = list(executor.map(_join_chunk, lon_chunks, lat_chunks))
+    else:
+        results = [_join_chunk(lon, lat, counties) for lon, lat in zip(lon_chunks, lat_chunks)]
+    # map() keeps chunk order, so offsets are the chunk starts
+    point_idx = np.concatenate([idx + offset for (idx, _), offset in zip(results, bounds[:-1])])
+    county_idx = np.concatenate([idx for _, idx in results])
+    return point_idx.astype(np.int64), county_idx.astype(np.int64)
+
+def match_hurricane_points_to_counties(hurricane_df,
                                         county_shapefile='cb_2023_us_county_500k.shp',
                                         county_excel='coastline-counties-list.xlsx',
-                                        coastal_states=None):
+                                        coastal_states=None,
+                                        prefilter=True,
+                                        use_grid=True,
+                                        workers=1,
+                                        chunk_size=100_000):
     """
     Match hurricane path points to coastal counties.
     Args:
@@ -14,8 +90,17 @@ def match_hurricane_points_to_counties(hurricane_df,
         county_shapefile (str): Path to US counties shapefile.
         county_excel (str): Path to coastal counties Excel file.
         coastal_states (list or None): List of state names to filter (all caps). If None, uses all relevant states.
+        prefilter (bool): Mark points outside every county bounding box as unmatched without joining them.
+        use_grid (bool): Resolve points whose county grid cell lies inside one county or outside all
+                         of them from the grid, and join only the points in boundary cells. The grid
+                         covers every coastal county, so it is only used when coastal_states is None.
+        workers (int): Number of processes running the join; 1 joins in this process.
+        chunk_size (int): Points per join task.
     Returns:
-        GeoDataFrame: Hurricane points with county info (if matched).
+        GeoDataFrame: Hurricane points with county info (if matched), in the layout of a left
+                      gpd.sjoin(predicate='within'). joined.attrs['county_join_stats'] holds the number
+                      of points, how many the prefilter pruned, how many the county grid resolved
+                      and how many were joined exactly.
     """
     # Load coastal county boundaries
     gdf_counties = load_coastal_county_boundaries(
@@ -23,16 +108,67 @@ def match_hurricane_points_to_counties(hurricane_df,
         excel_path=county_excel,
         coastal_states=coastal_states
     )
-    # Convert hurricane points to GeoDataFrame
+    # Convert hurricane points to GeoDataFrame (positional index, restored at the end)
+    longitude = hurricane_df['longitude'].to_numpy(dtype=np.float64)
+    latitude = hurricane_df['latitude'].to_numpy(dtype=np.float64)
     gdf_points = gpd.GeoDataFrame(
-        hurricane_df.copy(),
-        geometry=[Point(xy) for xy in zip(hurricane_df['longitude'], hurricane_df['latitude'])],
+        hurricane_df.reset_index(drop=True),
+        geometry=gpd.points_from_xy(longitude, latitude),
         crs='EPSG:4326'
     )
     # Ensure both are in the same CRS
     gdf_counties = gdf_counties.to_crs(gdf_points.crs)
-    # Spatial join (left join: keep all hurricane points, add county info if matched)
-    joined = gpd.sjoin(gdf_points, gdf_counties, how='left', predicate='within')
+
+    # Envelope stage: only points inside some county's bounding box can be within the county
+    if prefilter:
+        tested = np.flatnonzero(points_in_envelopes(longitude, latitude, gdf_counties.geometry.bounds.to_numpy()))
+    else:
+        tested = np.arange(len(gdf_points))
+
+    # Grid stage: cells inside one county or outside all of them need no exact test
+    grid_idx, grid_county = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    n_candidates = len(tested)
+    if use_grid and coastal_states is None:
+        cell = get_county_grid(county_shapefile, county_excel).cells(latitude[tested], longitude[tested])
+        inside = cell >= 0
+        grid_idx, grid_county = tested[inside], cell[inside].astype(np.int64)
+        tested = tested[cell == BOUNDARY]
+
+    # Spatial join of the remaining points, as (point, county) position pairs
+    point_idx, county_idx = _join_points(
+        longitude[tested], latitude[tested], gdf_counties[['geometry']].reset_index(drop=True),
+        workers=workers, chunk_size=chunk_size
+    )
+    point_idx = np.concatenate([grid_idx, tested[point_idx]])
+    county_idx = np.concatenate([grid_county, county_idx])
+    # Left join: every point without a match keeps one row with no county
+    unmatched = np.setdiff1d(np.arange(len(gdf_points)), point_idx)
+    point_idx = np.concatenate([point_idx, unmatched])
+    county_idx = np.concatenate([county_idx, np.full(len(unmatched), -1)])
+    # Same row order as gpd.sjoin: by point, then by county
+    order = np.lexsort((county_idx, point_idx))
+    point_idx, county_idx = point_idx[order], county_idx[order]
+
+    points = gdf_points.iloc[point_idx]
+    attributes = gdf_counties.drop(columns=gdf_counties.geometry.name).reset_index(drop=True)
+    # Label -1 is missing from the RangeIndex, so unmatched rows come back as NaN
+    counties = attributes.reindex(county_idx).set_axis(points.index)
+    matched = county_idx >= 0
+    index_right = gdf_counties.index.to_numpy()[np.where(matched, county_idx, 0)]
+    if not matched.all():
+        index_right = np.where(matched, index_right, np.nan)
+    # Suffix clashing column names like gpd.sjoin does
+    shared = points.columns.intersection(counties.columns)
+    points = points.rename(columns={c: f'{c}_left' for c in shared})
+    counties = counties.rename(columns={c: f'{c}_right' for c in shared})
+    joined = pd.concat([points.assign(index_right=index_right), counties], axis=1)
+    joined.index = hurricane_df.index[point_idx]
+    joined.attrs['county_join_stats'] = {
+        'points': len(gdf_points),
+        'pruned': len(gdf_points) - n_candidates,
+        'grid': n_candidates - len(tested),
+        'tested': len(tested),
+    }
     return joined
 
 if __name__ == "__main__":
@@ -43,4 +179,53 @@ if __name__ == "__main__":
         'date': ['20230901', '20230902', '20230903']
     })
     result = match_hurricane_points_to_counties(sample_points)
-    print(result[['latitude', 'longitude', 'date', 'state_name', 'county_name', 'region']]) 
\ No newline at end of file
+    print(result[['latitude', 'longitude', 'date', 'state_name', 'county_name', 'region']])
+
+    # Envelope stage on the full HURDAT2 history
+    from hurdat2_reader import read_hurdat2
+    from track_schema import derive_track_columns
+    df = derive_track_columns(read_hurdat2())
+    # The sample above already loaded the county store, so both timings are warm
+    timings = {}
+    for prefilter, use_grid in [(False, False), (True, False), (True, True)]:
+        start = time.perf_counter()
+        joined = match_hurricane_points_to_counties(df, prefilter=prefilter, use_grid=use_grid)
+        timings[prefilter, use_grid] = time.perf_counter() - start
+        if not prefilter:
+            expected = joined
+        pd.testing.assert_frame_equal(joined, expected)
+    stats = joined.attrs['county_join_stats']
+    print(f"{stats['points']} fixes: {stats['pruned']} pruned by the envelope stage "
+          f"({stats['pruned'] / stats['points']:.1%}), {stats['grid']} resolved by the county grid, "
+          f"{stats['tested']} joined exactly")
+    print(f"without prefilter: {timings[False, False]:.2f}s, with prefilter: {timings[True, False]:.2f}s, "
+          f"with prefilter and grid: {timings[True, True]:.2f}s")
+
+    # Nothing left for the exact join (points at sea), or less than a chunk: no pool is started
+    at_sea = pd.DataFrame({'latitude': np.full(1000, 25.0), 'longitude': np.full(1000, -60.0)})
+    for points in [at_sea, df.head(1000)]:
+        start = time.perf_counter()
+        joined = match_hurricane_points_to_counties(points, workers=4)
+        pd.testing.assert_frame_equal(joined, match_hurricane_points_to_counties(points, use_grid=False))
+        print(f"{len(points)} points, {joined.attrs['county_join_stats']['tested']} joined exactly, "
+              f"workers=4: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Parallel join on a larger synthetic point set over the coastal area
+    bounds = load_coastal_county_boundaries().total_bounds
+    rng = np.random.default_rng(0)
+    n = 2_000_000
+    synthetic = pd.DataFrame({
+        'latitude': rng.uniform(bounds[1], bounds[3], n),
+        'longitude': rng.uniform(bounds[0], bounds[2], n),
+    })
+    print(f"{n} synthetic points, {os.cpu_count()} CPUs")
+    expected = match_hurricane_points_to_counties(synthetic)
+    # Without the grid enough points reach the exact join to spread over a pool
+    for workers in [1, 2, 4, 8]:
+        start = time.perf_counter()
+        joined = match_hurricane_points_to_counties(synthetic, use_grid=False, workers=workers)
+        seconds = time.perf_counter() - start
+        if workers == 1:
+            serial_seconds = seconds
+        pd.testing.assert_frame_equal(joined, expected)
+        print(f"workers={workers}: {seconds:.2f}s ({serial_seconds / seconds:.2f}x)")
@@ -207,88 +207,128 @@ def simulate_active_storm():
     
     return active_storm
 
+# Colors of the Saffir-Simpson categories
+CATEGORY_COLORS = {
+    1: "#74add1",  # Light blue
+    2: "#fee090",  # Yellow
+    3: "#f46d43",  # Orange
+    4: "#d73027",  # Red
+    5: "#a50026"   # Dark red
+}
+
 def get_category_color(category):
     """Return color based on hurricane category"""
-    colors = {
-        1: "#74add1",  # Light blue
-        2: "#fee090",  # Yellow
-        3: "#f46d43",  # Orange
-        4: "#d73027",  # Red
-        5: "#a50026"   # Dark red
-    }
-    return colors.get(category, "#808080")
+    return CATEGORY_COLORS.get(category, "#808080")
+
+def category_colorscale():
+    """
+    Stepwise colorscale giving markers colored by category number (cmin -0.5, cmax 5.5)
+    the colors of get_category_color; numeric colors skip plotly's per-point color validation.
+    """
+    colorscale = []
+    for category in range(6):
+        color = get_category_color(category)
+        colorscale += [[category / 6, color], [(category + 1) / 6, color]]
+    return colorscale
+
+def historical_storm_table(hurricanes):
+    """
+    Columnar form of the historical hurricanes.
+    Returns:
+        tuple: (pd.DataFrame, pd.DataFrame) one row per storm (without its path) and
+               one row per path point, whose 'storm' column is the storm's row.
+    """
+    storms = pd.DataFrame([{key: value for key, value in h.items() if key != "path"} for h in hurricanes])
+    points = pd.DataFrame([point for h in hurricanes for point in h["path"]],
+                          columns=["lat", "lon", "time", "wind", "category"])
+    points.insert(0, "storm", np.repeat(np.arange(len(hurricanes)), [len(h["path"]) for h in hurricanes]))
+    return storms, points
+
+def none_separated(values, storm):
+    """Point values of consecutive storms in one array, with None between storms so one trace draws every path."""
+    return np.insert(np.asarray(values, dtype=object), np.flatnonzero(np.diff(storm)) + 1, None)
 
 def create_historical_map(hurricanes, selected_years, selected_names, selected_states):
-    """Create interactive map showing historical hurricane paths"""
+    """
+    Create interactive map showing historical hurricane paths.
+    Storms share a handful of WebGL traces (one line trace per category, one for all
+    track points, one for the landfalls) instead of two traces each.
+    """
     fig = go.Figure()
+    storms, points = historical_storm_table(hurricanes)
     
     # Filter hurricanes based on selections
-    filtered_hurricanes = []
-    for hurricane in hurricanes:
-        if (hurricane["year"] in selected_years and 
-            hurricane["name"] in selected_names and 
-            hurricane["state"] in selected_states):
-            filtered_hurricanes.append(hurricane)
-    
-    # Add hurricane paths
-    for hurricane in filtered_hurricanes:
-        path_data = hurricane["path"]
-        
-        # Extract coordinates and categories
-        lats = [point["lat"] for point in path_data]
-        lons = [point["lon"] for point in path_data]
-        categories = [point["category"] for point in path_data]
-        winds = [point["wind"] for point in path_data]
-        times = [point["time"] for point in path_data]
-        
-        # Add path line
-        fig.add_trace(go.Scattermapbox(
-            lat=lats,
-            lon=lons,
-            mode='lines+markers',
-            line=dict(width=4, color=get_category_color(hurricane["category"])),
-            marker=dict(
-                size=8,
-                color=[get_category_color(cat) for cat in categories],
-                symbol="circle"
-            ),
-            name=f"{hurricane['name']} ({hurricane['year']})",
-            hovertemplate=(
-                "<b>%{text}</b><br>"
-                "Lat: %{lat:.2f}<br>"
-                "Lon: %{lon:.2f}<br>"
-                "Wind: %{customdata[0]} mph<br>"
-                "Category: %{customdata[1]}<br>"
-                "Time: %{customdata[2]}"
-                "<extra></extra>"
-            ),
-            text=[f"{hurricane['name']} ({hurricane['year']})" for _ in lats],
-            customdata=list(zip(winds, categories, times))
-        ))
-        
-        # Add landfall marker
-        landfall_point = path_data[-1]  # Last point as approximation
+    storms = storms[storms["year"].isin(selected_years) &
+                    storms["name"].isin(selected_names) &
+                    storms["state"].isin(selected_states)]
+    points = points[points["storm"].isin(storms.index)]
+    storm_category = storms["category"].reindex(points["storm"]).to_numpy()
+    labels = (storms["name"] + " (" + storms["year"].astype(str) + ")").reindex(points["storm"]).to_numpy()
+    
+    # Path lines, colored by the storm's category
+    for category in sorted(storms["category"].unique()):
+        rows = points[storm_category == category]
         fig.add_trace(go.Scattermapbox(
-            lat=[landfall_point["lat"]],
-            lon=[landfall_point["lon"]],
-            mode='markers',
-            marker=dict(
-                size=15,
-                color='red',
-                symbol='star'
-            ),
-            name=f"{hurricane['name']} Landfall",
-            hovertemplate=(
-                f"<b>{hurricane['name']} Landfall</b><br>"
-                f"Date: {hurricane['landfall_date']}<br>"
-                f"Max Wind: {hurricane['max_wind_speed']} mph<br>"
-                f"Category: {hurricane['category']}<br>"
-                f"Damage: ${hurricane['estimated_damage']:.1f}B"
-                "<extra></extra>"
-            ),
-            showlegend=False
+            lat=none_separated(rows["lat"], rows["storm"]),
+            lon=none_separated(rows["lon"], rows["storm"]),
+            mode='lines',
+            line=dict(width=4, color=get_category_color(category)),
+            name=f"Category {category} paths",
+            hoverinfo='skip'
         ))
     
+    # Path points, colored by the category at each point
+    fig.add_trace(go.Scattermapbox(
+        lat=points["lat"],
+        lon=points["lon"],
+        mode='markers',
+        marker=dict(
+            size=8,
+            color=points["category"].to_numpy(),
+            colorscale=category_colorscale(),
+            cmin=-0.5,
+            cmax=5.5,
+            symbol="circle"
+        ),
+        name="Path points",
+        hovertemplate=(
+            "<b>%{text}</b><br>"
+            "Lat: %{lat:.2f}<br>"
+            "Lon: %{lon:.2f}<br>"
+            "Wind: %{customdata[0]} mph<br>"
+            "Category: %{customdata[1]}<br>"
+            "Time: %{customdata[2]}"
+            "<extra></extra>"
+        ),
+        text=labels,
+        customdata=points[["wind", "category", "time"]].to_numpy()
+    ))
+    
+    # Landfall markers
+    landfall_points = points.drop_duplicates("storm", keep="last")  # Last point as approximation
+    landfalls = storms.loc[landfall_points["storm"]]
+    fig.add_trace(go.Scattermapbox(
+        lat=landfall_points["lat"],
+        lon=landfall_points["lon"],
+        mode='markers',
+        marker=dict(
+            size=15,
+            color='red',
+            symbol='star'
+        ),
+        name="Landfall",
+        hovertemplate=(
+            "<b>%{customdata[0]} Landfall</b><br>"
+            "Date: %{customdata[1]}<br>"
+            "Max Wind: %{customdata[2]} mph<br>"
+            "Category: %{customdata[3]}<br>"
+            "Damage: $%{customdata[4]:.1f}B"
+            "<extra></extra>"
+        ),
+        customdata=landfalls[["name", "landfall_date", "max_wind_speed", "category", "estimated_damage"]].to_numpy(),
+        showlegend=False
+    ))
+    
     # Update layout
     fig.update_layout(
         mapbox=dict(
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+import folium
+import numpy as np
+import streamlit.components.v1 as components
+
+# Budget for the rendered maps kept in memory, shared by every page and session
+MAP_CACHE_BYTES = 64 * 2**20
+# Size of the map frame (the folium_static defaults)
+MAP_WIDTH = 700
+MAP_HEIGHT = 500
+
+
+def _canonical(value):
+    """Hashable, type-stable form of a filter value (numpy scalars -> Python, sequences -> tuples)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_canonical(v) for v in value)
+    return value
+
+
+def map_cache_key(view, dataset_version, **filters):
+    """
+    Canonical cache key of a map: the view drawing it, the version of the track table
+    and its filter values, in name order so keyword order does not matter.
+    """
+    return (view, dataset_version, tuple(sorted((name, _canonical(value)) for name, value in filters.items())))
+
+
+def map_html(m):
+    """Standalone HTML of a folium map, as folium_static renders it."""
+    return folium.Figure().add_child(m).render()
+
+
+class MapHtmlCache:
+    """
+    Bounded LRU cache of rendered map HTML.
+
+    Entries are evicted least recently used first once their total size passes
+    max_bytes. Lookups are counted, so hits, misses and evictions can be reported.
+    Safe to share between the threads of concurrent Streamlit sessions.
+    """
+
+    def __init__(self, max_bytes=MAP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached HTML for a key (marking it recently used), or None."""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return html
+
+    def put(self, key, html):
+        """Cache HTML under a key; maps larger than the whole budget are not kept."""
+        size = len(html.encode('utf-8'))
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key).encode('utf-8'))
+            if size > self.max_bytes:
+                return
+            self._entries[key] = html
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.encode('utf-8'))
+                self.evictions += 1
+
+    def get_or_render(self, key, build_map):
+        """
+        HTML of the map for a key, calling build_map() and rendering its result
+        only on a miss.
+        """
+        html = self.get(key)
+        if html is None:
+            html = map_html(build_map())
+            self.put(key, html)
+        return html
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+# Process-wide cache; page scripts are re-run on every interaction, this module is not
+MAP_HTML_CACHE = MapHtmlCache()
+
+
+def show_cached_map(key, build_map, width=MAP_WIDTH, height=MAP_HEIGHT, cache=MAP_HTML_CACHE):
+    """
+    Show a folium map in Streamlit like folium_static, building and rendering it
+    only when no map with the same key is cached.
+    Args:
+        key (tuple): Output of map_cache_key.
+        build_map (callable): Returns the folium.Map to draw on a cache miss.
+    """
+    components.html(cache.get_or_render(key, build_map), height=height + 10, width=width)
+
+
+if __name__ == "__main__":
+    from track_cache import load_joined_points
+    from track_map import plot_hurricane_paths
+    df = load_joined_points()
+    version = df.attrs['dataset_version']
+
+    def build_map(year):
+        year_df = df[df['year'] == year]
+        m = folium.Map(location=[30, -80], zoom_start=4)
+        plot_hurricane_paths(m, year_df, year_df['hurricane_id'].unique().tolist())
+        return m
+
+    # Keys do not depend on keyword order or numpy scalar types
+    assert map_cache_key('v', version, year=np.int16(2020), region='Any') == map_cache_key('v', version, region='Any', year=2020)
+
+    last_year = int(df['year'].max())
+    cache = MapHtmlCache()
+    for attempt in ['miss', 'hit']:
+        start = time.perf_counter()
+        html = cache.get_or_render(map_cache_key('bench', version, year=last_year), lambda: build_map(last_year))
+        print(f"{attempt}: {(time.perf_counter() - start) * 1000:.1f} ms, {len(html) / 2**10:.0f} KiB")
+
+    # A small budget keeps only the most recently used maps
+    cache = MapHtmlCache(max_bytes=3 * len(html.encode('utf-8')))
+    for year in range(last_year - 9, last_year + 1):
+        cache.get_or_render(map_cache_key('bench', version, year=year), lambda: build_map(year))
+    assert cache.size <= cache.max_bytes
+    assert cache.get(map_cache_key('bench', version, year=last_year)) is not None
+    assert cache.get(map_cache_key('bench', version, year=last_year - 9)) is None
+    print(cache.stats())
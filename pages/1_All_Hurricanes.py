@@ -1,74 +1,28 @@
 import streamlit as st
 import folium
-from streamlit_folium import folium_static
 import pandas as pd
 import plotly.express as px
-from hurricane_county_matcher import match_hurricane_points_to_counties
-from coastal_county_matcher import load_coastal_county_boundaries
+from track_cache import load_joined_points
+from county_overlays import overlay_counties
+from track_map import plot_hurricane_paths
+from track_density import TrackDensity, plot_track_density
+from map_cache import MAP_HTML_CACHE, map_cache_key, show_cached_map
 from utils import calculate_weekly_frequency
 
-st.set_page_config(page_title="Hurricane Viewer", page_icon="🌊", layout="wide")
+# Initial zoom of the maps; the track simplification is picked for it
+MAP_ZOOM = 4
 
-CATEGORY_COLORS = {
-    0: 'gray', 1: 'blue', 2: 'green', 3: 'yellow', 4: 'orange', 5: 'red'
-}
+st.set_page_config(page_title="Hurricane Viewer", page_icon="🌊", layout="wide")
 
 @st.cache_data(show_spinner=True)
 def get_joined_points():
-    from hurricane_app import process_hurricane_data, get_hurricane_category
-    df = process_hurricane_data()
-    df['category'] = df['wind_speed'].apply(get_hurricane_category)
-    df['hurricane_id'] = df['name'] + ' (' + df['year'].astype(str) + ')'
-    join_cols = ['hurricane_id', 'name', 'year', 'date', 'time', 'latitude', 'longitude', 'category', 'wind_speed']
-    df = df[join_cols]
-    joined = match_hurricane_points_to_counties(df)
-    return joined
-
-def overlay_counties(m, region):
-    gdf = load_coastal_county_boundaries()
-    if region == 'Atlantic':
-        gdf = gdf[gdf['region'] == 'Atlantic']
-        color = 'blue'
-    elif region == 'Gulf of Mexico':
-        gdf = gdf[gdf['region'] == 'Gulf of Mexico']
-        color = 'green'
-    elif region == 'Both':
-        gdf = gdf[(gdf['region'] == 'Atlantic') | (gdf['region'] == 'Gulf of Mexico')]
-        color = 'purple'
-    else:  # 'Any'
-        gdf = gdf[(gdf['region'] == 'Atlantic') | (gdf['region'] == 'Gulf of Mexico')]
-        color = 'blue' # Or a different color for 'Any' if preferred
-    folium.GeoJson(gdf, name=f'{region} Counties', style_function=lambda x: {'color': color, 'fillColor': color, 'weight': 2, 'fillOpacity': 0.15}).add_to(m)
-
-def plot_hurricane_paths(m, filtered_df, hurricanes_to_plot):
-    for hurricane_id in hurricanes_to_plot:
-        storm_df = filtered_df[filtered_df['hurricane_id'] == hurricane_id].sort_values(['date', 'time'])
-        if not storm_df.empty:
-            path_points = storm_df[['latitude', 'longitude', 'category', 'name', 'date']].values
-            for i in range(len(path_points) - 1):
-                latlon1 = (path_points[i][0], path_points[i][1])
-                latlon2 = (path_points[i+1][0], path_points[i+1][1])
-                cat = int(path_points[i][2])
-                name = path_points[i][3]
-                date = path_points[i][4]
-                folium.PolyLine(
-                    [latlon1, latlon2],
-                    color=CATEGORY_COLORS.get(cat, 'black'),
-                    weight=4,
-                    opacity=0.8,
-                    tooltip=f"{name} | Cat {cat} | {date}"
-                ).add_to(m)
-            # Add start and end markers
-            if len(path_points) > 0:
-                folium.Marker(
-                    (path_points[0][0], path_points[0][1]),
-                    popup=f"Start: {name} ({path_points[0][4]})"
-                ).add_to(m)
-                if len(path_points) > 1:
-                    folium.Marker(
-                        (path_points[-1][0], path_points[-1][1]),
-                        popup=f"End: {name} ({path_points[-1][4]})"
-                    ).add_to(m)
+    return load_joined_points()
+
+@st.cache_resource(show_spinner=True)
+def get_track_density(dataset_version):
+    # Keyed by dataset version, so a new HURDAT2 revision rebuilds the grid
+    # Storm regions follow the category floor, like the region filter of the track view
+    return TrackDensity.build(get_joined_points(), floor_regions=True)
 
 # --- PAGE CONTENT ---
 st.title("Hurricane Viewer")
@@ -87,6 +41,8 @@ min_category = st.sidebar.selectbox("Minimum Category", options=[0, 1, 2, 3, 4,
                                   help="Show only hurricanes of this category or higher")
 region_filter = st.sidebar.selectbox("Region", options=['Any', 'Atlantic', 'Gulf of Mexico', 'Both'], index=0)
 show_all = st.sidebar.checkbox("Show all hurricanes for this period", value=True)
+map_mode = st.sidebar.radio("Map Mode", options=["Tracks", "Density"], index=0,
+                            help="Density counts the track fixes of the matching storms on a grid")
 
 # Filter data by minimum category and selected year
 filtered_df_category = df[
@@ -94,7 +50,7 @@ filtered_df_category = df[
 ].copy()
 
 # Get hurricanes that match the region filter from the category-filtered data
-hurricane_region_map = filtered_df_category.groupby('hurricane_id')['region'].agg(lambda x: set(x.dropna())).to_dict()
+hurricane_region_map = filtered_df_category.groupby('hurricane_id', observed=True)['region'].apply(lambda x: set(x.dropna())).to_dict()
 
 if region_filter == 'Any':
     hurricanes_in_region = [hid for hid, regions in hurricane_region_map.items() 
@@ -130,20 +86,38 @@ else:
     else:
         hurricanes_to_plot = [] # No hurricanes to plot if dropdown is empty
 
-if not filtered_df.empty and hurricanes_to_plot:
-    # Center map on the first point of the first hurricane to plot, or a default location
-    first_hurricane_df = filtered_df[filtered_df['hurricane_id'] == hurricanes_to_plot[0]].sort_values(['date', 'time'])
-    if not first_hurricane_df.empty:
-         center_lat = first_hurricane_df.iloc[0]['latitude']
-         center_lon = first_hurricane_df.iloc[0]['longitude']
-    else:
-        center_lat = 25.0
-        center_lon = -80.0 # Default center near Florida
-        
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=4)
-    overlay_counties(m, region_filter)
-    plot_hurricane_paths(m, filtered_df, hurricanes_to_plot)
-    folium_static(m)
+# Maps are rendered once per filter state and dataset version, then served from the cache
+map_key = map_cache_key('all_hurricanes', df.attrs.get('dataset_version'), year=selected_year,
+                        min_category=min_category, region=region_filter, mode=map_mode,
+                        hurricanes=None if show_all else hurricanes_to_plot)
+
+if map_mode == "Density":
+    # Fixes at or above the minimum category, for storms that crossed the region at or above it
+    density = get_track_density(df.attrs.get('dataset_version'))
+    def build_density_map():
+        m = folium.Map(location=[30, -75], zoom_start=MAP_ZOOM)
+        overlay_counties(m, region_filter)
+        plot_track_density(m, density, selected_year, selected_year, region_filter, min_category)
+        return m
+    show_cached_map(map_key, build_density_map)
+    n_fixes = density.grid(selected_year, selected_year, region_filter, min_category).sum()
+    st.write(f"Track fixes counted: {n_fixes}")
+elif not filtered_df.empty and hurricanes_to_plot:
+    def build_track_map():
+        # Center map on the first point of the first hurricane to plot, or a default location
+        first_hurricane_df = filtered_df[filtered_df['hurricane_id'] == hurricanes_to_plot[0]].sort_values('timestamp')
+        if not first_hurricane_df.empty:
+             center_lat = first_hurricane_df.iloc[0]['latitude']
+             center_lon = first_hurricane_df.iloc[0]['longitude']
+        else:
+            center_lat = 25.0
+            center_lon = -80.0 # Default center near Florida
+            
+        m = folium.Map(location=[center_lat, center_lon], zoom_start=MAP_ZOOM)
+        overlay_counties(m, region_filter)
+        plot_hurricane_paths(m, filtered_df, hurricanes_to_plot, zoom=MAP_ZOOM)
+        return m
+    show_cached_map(map_key, build_track_map)
     st.write(f"Number of hurricanes displayed: {len(hurricanes_to_plot)}")
 elif not filtered_df_category.empty and not hurricanes_in_region:
      st.warning(f"No hurricanes found for the selected region '{region_filter}' and criteria.")
@@ -152,6 +126,10 @@ elif not filtered_df_category.empty and hurricanes_in_region and not hurricanes_
 else:
     st.warning("No hurricanes found for the selected criteria.")
 
+map_stats = MAP_HTML_CACHE.stats()
+st.sidebar.caption(f"Map cache: {map_stats['hits']} hits, {map_stats['misses']} misses, "
+                   f"{map_stats['entries']} maps ({map_stats['bytes'] / 2**20:.1f} MiB)")
+
 # Optional: Display filtered raw data
 # st.subheader("Raw Data for Displayed Hurricanes")
 # if not filtered_df.empty:
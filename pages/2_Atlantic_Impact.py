@@ -1,77 +1,39 @@
 import streamlit as st
 import folium
-from streamlit_folium import folium_static
 import pandas as pd
 import plotly.express as px
-from hurricane_county_matcher import match_hurricane_points_to_counties
-from coastal_county_matcher import load_coastal_county_boundaries
-from utils import calculate_weekly_frequency
+from track_cache import load_joined_points
+from county_overlays import overlay_counties
+from track_map import plot_hurricane_paths
+from track_density import TrackDensity, plot_track_density
+from map_cache import MAP_HTML_CACHE, map_cache_key, show_cached_map
+from utils import WeeklyPresence
 
-st.set_page_config(page_title="Hurricane Analysis", page_icon="🌊", layout="wide")
+# Initial zoom of the maps; the track simplification is picked for it
+MAP_ZOOM = 4
 
-CATEGORY_COLORS = {
-    0: 'gray', 1: 'blue', 2: 'green', 3: 'yellow', 4: 'orange', 5: 'red'
-}
+st.set_page_config(page_title="Hurricane Analysis", page_icon="🌊", layout="wide")
 
 @st.cache_data(show_spinner=True)
 def get_joined_points():
-    from hurricane_app import process_hurricane_data, get_hurricane_category
-    df = process_hurricane_data()
-    df['category'] = df['wind_speed'].apply(get_hurricane_category)
-    df['hurricane_id'] = df['name'] + ' (' + df['year'].astype(str) + ')'
-    join_cols = ['hurricane_id', 'name', 'year', 'date', 'time', 'latitude', 'longitude', 'category', 'wind_speed']
-    df = df[join_cols]
-    joined = match_hurricane_points_to_counties(df)
-    return joined
+    return load_joined_points()
 
-def overlay_counties(m, region):
-    gdf = load_coastal_county_boundaries()
-    if region == 'Atlantic':
-        gdf = gdf[gdf['region'] == 'Atlantic']
-        color = 'blue'
-    elif region == 'Gulf of Mexico':
-        gdf = gdf[gdf['region'] == 'Gulf of Mexico']
-        color = 'green'
-    else:  # 'Any' or 'Both'
-        gdf = gdf[(gdf['region'] == 'Atlantic') | (gdf['region'] == 'Gulf of Mexico')]
-        color = 'blue'
-    folium.GeoJson(gdf, name=f'{region} Counties', style_function=lambda x: {'color': color, 'fillColor': color, 'weight': 2, 'fillOpacity': 0.15}).add_to(m)
+@st.cache_resource(show_spinner=True)
+def get_weekly_presence(dataset_version):
+    # Built once per dataset version; each frequency query is then a slice of the cube
+    return WeeklyPresence.build(get_joined_points())
 
-def plot_hurricane_paths(m, filtered_df, hurricanes_in_range):
-    for hurricane_id in hurricanes_in_range:
-        storm_df = filtered_df[filtered_df['hurricane_id'] == hurricane_id].sort_values(['date', 'time'])
-        if not storm_df.empty:
-            path_points = storm_df[['latitude', 'longitude', 'category', 'name', 'date']].values
-            for i in range(len(path_points) - 1):
-                latlon1 = (path_points[i][0], path_points[i][1])
-                latlon2 = (path_points[i+1][0], path_points[i+1][1])
-                cat = int(path_points[i][2])
-                name = path_points[i][3]
-                date = path_points[i][4]
-                folium.PolyLine(
-                    [latlon1, latlon2],
-                    color=CATEGORY_COLORS.get(cat, 'black'),
-                    weight=4,
-                    opacity=0.8,
-                    tooltip=f"{name} | Cat {cat} | {date}"
-                ).add_to(m)
-            # Add start and end markers
-            if len(path_points) > 0:
-                folium.Marker(
-                    (path_points[0][0], path_points[0][1]),
-                    popup=f"Start: {name} ({path_points[0][4]})"
-                ).add_to(m)
-                if len(path_points) > 1:
-                    folium.Marker(
-                        (path_points[-1][0], path_points[-1][1]),
-                        popup=f"End: {name} ({path_points[-1][4]})"
-                    ).add_to(m)
+@st.cache_resource(show_spinner=True)
+def get_track_density(dataset_version):
+    # Keyed by dataset version, so a new HURDAT2 revision rebuilds the grid
+    return TrackDensity.build(get_joined_points())
 
 # --- PAGE CONTENT ---
 st.title("Hurricane Analysis")
 
 # Get the data
 df = get_joined_points()
+presence = get_weekly_presence(df.attrs.get('dataset_version'))
 
 # Sidebar filters
 st.sidebar.header("Filters")
@@ -82,6 +44,8 @@ end_year = st.sidebar.number_input("End Year", min_value=min_year, max_value=max
 min_category = st.sidebar.selectbox("Minimum Category", options=[0, 1, 2, 3, 4, 5], index=0, 
                                   help="Show only hurricanes of this category or higher")
 show_all = st.sidebar.checkbox("Show all hurricanes for this period", value=True)
+map_mode = st.sidebar.radio("Map Mode", options=["Tracks", "Density"], index=0,
+                            help="Density counts the track fixes on a grid; it stays fast for any period")
 
 if start_year > end_year:
     st.sidebar.error("Start year must be less than or equal to end year.")
@@ -90,7 +54,7 @@ else:
     tab1, tab2, tab3 = st.tabs(["All Regions", "Atlantic", "Gulf of Mexico"])
     
     # Get hurricanes for the selected period and category
-    hurricane_region_map = df.groupby('hurricane_id')['region'].agg(lambda x: set(x.dropna())).to_dict()
+    hurricane_region_map = df.groupby('hurricane_id', observed=True)['region'].apply(lambda x: set(x.dropna())).to_dict()
     
     # Function to get hurricanes for a specific region
     def get_hurricanes_for_region(region):
@@ -105,12 +69,39 @@ else:
                    and start_year <= df[df['hurricane_id']==hid]['year'].iloc[0] <= end_year
                    and df[df['hurricane_id']==hid]['category'].max() >= min_category]
     
+    # Density of the fixes at or above the minimum category, for storms that crossed the region
+    def show_density_map(region):
+        density = get_track_density(df.attrs.get('dataset_version'))
+        def build_map():
+            m = folium.Map(location=[30, -75], zoom_start=MAP_ZOOM)
+            overlay_counties(m, region)
+            plot_track_density(m, density, start_year, end_year, region, min_category)
+            return m
+        show_cached_map(map_cache_key('atlantic_impact', df.attrs.get('dataset_version'), mode='Density',
+                                      region=region, start_year=start_year, end_year=end_year,
+                                      min_category=min_category), build_map)
+        n_fixes = density.grid(start_year, end_year, region, min_category).sum()
+        st.write(f"Track fixes counted: {n_fixes}")
+    
+    # Tracks of the given storms; maps are rendered once per filter state and dataset version
+    def show_track_map(region, hurricanes, filtered_df):
+        def build_map():
+            center_lat = filtered_df['latitude'].mean()
+            center_lon = filtered_df['longitude'].mean()
+            m = folium.Map(location=[center_lat, center_lon], zoom_start=MAP_ZOOM)
+            overlay_counties(m, region)
+            plot_hurricane_paths(m, filtered_df, hurricanes, zoom=MAP_ZOOM)
+            return m
+        show_cached_map(map_cache_key('atlantic_impact', df.attrs.get('dataset_version'), mode='Tracks',
+                                      region=region, start_year=start_year, end_year=end_year,
+                                      min_category=min_category), build_map)
+    
     # Tab 1: All Regions
     with tab1:
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Weekly Hurricane Frequency")
-            freq_all = calculate_weekly_frequency(df, 'Any', start_year, end_year, min_category)
+            freq_all = presence.weekly_frequency('Any', start_year, end_year, min_category)
             fig_all = px.bar(freq_all, 
                            x='Week', 
                            y='Probability',
@@ -126,27 +117,25 @@ else:
         
         with col2:
             st.subheader("Hurricane Map")
-            hurricanes_all = get_hurricanes_for_region('Any')
-            filtered_df = df[(df['hurricane_id'].isin(hurricanes_all)) & 
-                           (df['year'] >= start_year) & 
-                           (df['year'] <= end_year)]
-            if not filtered_df.empty:
-                center_lat = filtered_df['latitude'].mean()
-                center_lon = filtered_df['longitude'].mean()
-                m = folium.Map(location=[center_lat, center_lon], zoom_start=4)
-                overlay_counties(m, 'Any')
-                plot_hurricane_paths(m, filtered_df, hurricanes_all)
-                folium_static(m)
-                st.write(f"Number of hurricanes: {len(hurricanes_all)}")
+            if map_mode == "Density":
+                show_density_map('Any')
             else:
-                st.warning("No hurricanes found for the selected criteria.")
+                hurricanes_all = get_hurricanes_for_region('Any')
+                filtered_df = df[(df['hurricane_id'].isin(hurricanes_all)) & 
+                               (df['year'] >= start_year) & 
+                               (df['year'] <= end_year)]
+                if not filtered_df.empty:
+                    show_track_map('Any', hurricanes_all, filtered_df)
+                    st.write(f"Number of hurricanes: {len(hurricanes_all)}")
+                else:
+                    st.warning("No hurricanes found for the selected criteria.")
     
     # Tab 2: Atlantic
     with tab2:
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Weekly Hurricane Frequency")
-            freq_atlantic = calculate_weekly_frequency(df, 'Atlantic', start_year, end_year, min_category)
+            freq_atlantic = presence.weekly_frequency('Atlantic', start_year, end_year, min_category)
             fig_atlantic = px.bar(freq_atlantic, 
                                 x='Week', 
                                 y='Probability',
@@ -162,27 +151,25 @@ else:
         
         with col2:
             st.subheader("Hurricane Map")
-            hurricanes_atlantic = get_hurricanes_for_region('Atlantic')
-            filtered_df = df[(df['hurricane_id'].isin(hurricanes_atlantic)) & 
-                           (df['year'] >= start_year) & 
-                           (df['year'] <= end_year)]
-            if not filtered_df.empty:
-                center_lat = filtered_df['latitude'].mean()
-                center_lon = filtered_df['longitude'].mean()
-                m = folium.Map(location=[center_lat, center_lon], zoom_start=4)
-                overlay_counties(m, 'Atlantic')
-                plot_hurricane_paths(m, filtered_df, hurricanes_atlantic)
-                folium_static(m)
-                st.write(f"Number of hurricanes: {len(hurricanes_atlantic)}")
+            if map_mode == "Density":
+                show_density_map('Atlantic')
             else:
-                st.warning("No hurricanes found for the selected criteria.")
+                hurricanes_atlantic = get_hurricanes_for_region('Atlantic')
+                filtered_df = df[(df['hurricane_id'].isin(hurricanes_atlantic)) & 
+                               (df['year'] >= start_year) & 
+                               (df['year'] <= end_year)]
+                if not filtered_df.empty:
+                    show_track_map('Atlantic', hurricanes_atlantic, filtered_df)
+                    st.write(f"Number of hurricanes: {len(hurricanes_atlantic)}")
+                else:
+                    st.warning("No hurricanes found for the selected criteria.")
     
     # Tab 3: Gulf of Mexico
     with tab3:
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Weekly Hurricane Frequency")
-            freq_gulf = calculate_weekly_frequency(df, 'Gulf of Mexico', start_year, end_year, min_category)
+            freq_gulf = presence.weekly_frequency('Gulf of Mexico', start_year, end_year, min_category)
             fig_gulf = px.bar(freq_gulf, 
                             x='Week', 
                             y='Probability',
@@ -198,17 +185,19 @@ else:
         
         with col2:
             st.subheader("Hurricane Map")
-            hurricanes_gulf = get_hurricanes_for_region('Gulf of Mexico')
-            filtered_df = df[(df['hurricane_id'].isin(hurricanes_gulf)) & 
-                           (df['year'] >= start_year) & 
-                           (df['year'] <= end_year)]
-            if not filtered_df.empty:
-                center_lat = filtered_df['latitude'].mean()
-                center_lon = filtered_df['longitude'].mean()
-                m = folium.Map(location=[center_lat, center_lon], zoom_start=4)
-                overlay_counties(m, 'Gulf of Mexico')
-                plot_hurricane_paths(m, filtered_df, hurricanes_gulf)
-                folium_static(m)
-                st.write(f"Number of hurricanes: {len(hurricanes_gulf)}")
+            if map_mode == "Density":
+                show_density_map('Gulf of Mexico')
             else:
-                st.warning("No hurricanes found for the selected criteria.") 
+                hurricanes_gulf = get_hurricanes_for_region('Gulf of Mexico')
+                filtered_df = df[(df['hurricane_id'].isin(hurricanes_gulf)) & 
+                               (df['year'] >= start_year) & 
+                               (df['year'] <= end_year)]
+                if not filtered_df.empty:
+                    show_track_map('Gulf of Mexico', hurricanes_gulf, filtered_df)
+                    st.write(f"Number of hurricanes: {len(hurricanes_gulf)}")
+                else:
+                    st.warning("No hurricanes found for the selected criteria.")
+
+map_stats = MAP_HTML_CACHE.stats()
+st.sidebar.caption(f"Map cache: {map_stats['hits']} hits, {map_stats['misses']} misses, "
+                   f"{map_stats['entries']} maps ({map_stats['bytes'] / 2**20:.1f} MiB)")
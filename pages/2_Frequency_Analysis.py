@@ -1,27 +1,36 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from hurricane_county_matcher import match_hurricane_points_to_counties
-from utils import calculate_weekly_frequency
+from track_cache import load_joined_points
+from utils import (DailyPresence, SMOOTHING_DAYS, WeeklyPresence, bootstrap_weekly_probability,
+                   climatology_table)
 
 st.set_page_config(page_title="Hurricane Frequency Analysis", page_icon="📊")
 
 @st.cache_data(show_spinner=True)
 def get_joined_points():
-    from hurricane_app import process_hurricane_data, get_hurricane_category
-    df = process_hurricane_data()
-    df['category'] = df['wind_speed'].apply(get_hurricane_category)
-    df['hurricane_id'] = df['name'] + ' (' + df['year'].astype(str) + ')'
-    join_cols = ['hurricane_id', 'name', 'year', 'date', 'time', 'latitude', 'longitude', 'category', 'wind_speed']
-    df = df[join_cols]
-    joined = match_hurricane_points_to_counties(df)
-    return joined
+    return load_joined_points()
+
+@st.cache_resource(show_spinner=True)
+def get_weekly_presence(dataset_version):
+    # Built once per dataset version; each frequency query is then a slice of the cube
+    return WeeklyPresence.build(get_joined_points())
+
+@st.cache_resource(show_spinner=True)
+def get_daily_presence(dataset_version):
+    return DailyPresence.build(get_joined_points())
+
+@st.cache_data(max_entries=64)
+def get_climatology(dataset_version, start_year, end_year, bandwidth):
+    # Every region and category threshold in one batched FFT, cached per dataset version and year range
+    return get_daily_presence(dataset_version).climatology(start_year, end_year, bandwidth)
 
 # --- PAGE CONTENT ---
 st.title("Hurricane Frequency Analysis")
 
 # Get the data
 df = get_joined_points()
+presence = get_weekly_presence(df.attrs.get('dataset_version'))
 df_coastal = df[(df['region'] == 'Atlantic') | (df['region'] == 'Gulf of Mexico')].copy()
 
 # Sidebar filters
@@ -32,21 +41,31 @@ start_year = st.sidebar.number_input("Start Year", min_value=min_year, max_value
 end_year = st.sidebar.number_input("End Year", min_value=min_year, max_value=max_year, value=max_year)
 min_category = st.sidebar.selectbox("Minimum Category", options=[0, 1, 2, 3, 4, 5], index=0, 
                                   help="Show only hurricanes of this category or higher")
+show_bands = st.sidebar.checkbox("Show 90% confidence bands", value=False,
+                                 help="Percentile bands from 10,000 bootstrap resamples of the selected years")
 
 if start_year > end_year:
     st.sidebar.error("Start year must be less than or equal to end year.")
 else:
-    # Calculate frequencies for all regions
-    freq_all = calculate_weekly_frequency(df, 'Any', start_year, end_year, min_category)
-    freq_atlantic = calculate_weekly_frequency(df, 'Atlantic', start_year, end_year, min_category)
-    freq_gulf = calculate_weekly_frequency(df, 'Gulf of Mexico', start_year, end_year, min_category)
+    # Calculate frequencies for all regions in one batch
+    freq = presence.weekly_frequencies(['Any', 'Atlantic', 'Gulf of Mexico'], start_year, end_year, [min_category])
+    freq_all = freq[['Week', 'Any']].rename(columns={'Any': 'Probability'})
+    freq_atlantic = freq[['Week', 'Atlantic']].rename(columns={'Atlantic': 'Probability'})
+    freq_gulf = freq[['Week', 'Gulf of Mexico']].rename(columns={'Gulf of Mexico': 'Probability'})
+    
+    # Error bars from the bootstrap bands around each weekly probability
+    def confidence_errors(freq_region, region):
+        if not show_bands:
+            return {}
+        lower, upper = bootstrap_weekly_probability(presence.presence(region, start_year, end_year, min_category))
+        return {'error_y': (upper - freq_region['Probability']).clip(lower=0),
+                'error_y_minus': (freq_region['Probability'] - lower).clip(lower=0)}
     
     # Combine frequencies into a single DataFrame for export
-    export_df = pd.DataFrame({
-        'Week': freq_all['Week'],
-        'Frequency_All': freq_all['Probability'],
-        'Frequency_Atlantic': freq_atlantic['Probability'],
-        'Frequency_Gulf': freq_gulf['Probability']
+    export_df = freq.rename(columns={
+        'Any': 'Frequency_All',
+        'Atlantic': 'Frequency_Atlantic',
+        'Gulf of Mexico': 'Frequency_Gulf'
     })
     
     # Create a descriptive filename
@@ -67,7 +86,8 @@ else:
                     x='Week', 
                     y='Probability',
                     title=f'Probability of Hurricane Occurrence by Week ({start_year}-{end_year}) - Category {min_category}+',
-                    labels={'Probability': 'Probability of at least one hurricane'})
+                    labels={'Probability': 'Probability of at least one hurricane'},
+                    **confidence_errors(freq_all, 'Any'))
     
     fig_all.update_layout(
         xaxis_title="Week of Year",
@@ -82,7 +102,8 @@ else:
                          x='Week', 
                          y='Probability',
                          title=f'Probability of Atlantic Hurricane Occurrence by Week ({start_year}-{end_year}) - Category {min_category}+',
-                         labels={'Probability': 'Probability of at least one hurricane'})
+                         labels={'Probability': 'Probability of at least one hurricane'},
+                         **confidence_errors(freq_atlantic, 'Atlantic'))
     
     fig_atlantic.update_layout(
         xaxis_title="Week of Year",
@@ -97,7 +118,8 @@ else:
                      x='Week', 
                      y='Probability',
                      title=f'Probability of Gulf Hurricane Occurrence by Week ({start_year}-{end_year}) - Category {min_category}+',
-                     labels={'Probability': 'Probability of at least one hurricane'})
+                     labels={'Probability': 'Probability of at least one hurricane'},
+                     **confidence_errors(freq_gulf, 'Gulf of Mexico'))
     
     fig_gulf.update_layout(
         xaxis_title="Week of Year",
@@ -105,4 +127,42 @@ else:
         yaxis_tickformat='.1%',
         showlegend=False
     )
-    st.plotly_chart(fig_gulf, use_container_width=True) 
+    st.plotly_chart(fig_gulf, use_container_width=True)
+    
+    # Day-of-year climatology: daily occurrence rate smoothed with a circular kernel
+    st.subheader("Daily Occurrence Climatology")
+    bandwidth = st.slider("Smoothing (days)", min_value=0, max_value=30, value=SMOOTHING_DAYS,
+                          help="Standard deviation of the Gaussian kernel; 0 shows the raw daily rates")
+    climatology = get_climatology(df.attrs.get('dataset_version'), start_year, end_year, bandwidth)
+    fig_daily = px.line(climatology_table(climatology, ['Any', 'Atlantic', 'Gulf of Mexico'], min_category),
+                        x='Day',
+                        y='Rate',
+                        color='Region',
+                        hover_data=['Date'],
+                        title=f'Daily Probability of Hurricane Occurrence ({start_year}-{end_year}) - Category {min_category}+')
+    fig_daily.update_layout(
+        xaxis_title="Day of Year",
+        yaxis_title="Probability",
+        yaxis_tickformat='.1%'
+    )
+    st.plotly_chart(fig_daily, use_container_width=True)
+    
+    # Trend: weekly probability over every window of consecutive years of the whole record
+    st.subheader("Trend of Weekly Probabilities")
+    col1, col2 = st.columns(2)
+    with col1:
+        trend_region = st.selectbox("Trend Region", options=['Any', 'Atlantic', 'Gulf of Mexico'], index=0)
+    with col2:
+        trend_window = st.number_input("Window (years)", min_value=1, max_value=max_year - min_year + 1,
+                                       value=min(30, max_year - min_year + 1))
+    window_starts, trend = presence.window_trend(trend_region, trend_window, min_category, min_year, max_year)
+    fig_trend = px.imshow(trend,
+                          x=list(range(1, trend.shape[1] + 1)),
+                          y=window_starts,
+                          aspect='auto',
+                          origin='lower',
+                          color_continuous_scale='YlOrRd',
+                          labels={'x': 'Week of Year', 'y': 'Window Start Year', 'color': 'Probability'},
+                          title=f'Probability by Week over {trend_window}-Year Windows ({trend_region}) - Category {min_category}+')
+    fig_trend.update_layout(coloraxis_colorbar_tickformat='.0%')
+    st.plotly_chart(fig_trend, use_container_width=True)
@@ -0,0 +1,143 @@
+import glob
+import json
+import os
+import time
+import pandas as pd
+from artifact_cache import (
+    CACHE_DIR, cache_path, input_digest, prune_artifacts, shapefile_paths, write_json_atomic, write_parquet_atomic
+)
+from hurdat2_reader import HURDAT2_FILE, read_hurdat2, storm_content_digests
+from hurricane_county_matcher import match_hurricane_points_to_counties
+from track_schema import apply_track_dtypes, derive_track_columns
+
+COUNTY_SHAPEFILE = 'cb_2023_us_county_500k.shp'
+COUNTY_EXCEL = 'coastline-counties-list.xlsx'
+# Bump whenever the layout of a cached artifact changes so stale files are never read back
+CACHE_VERSION = 5
+# Joined tables (and storm manifests) kept on disk; the newest is the base of incremental updates
+KEEP_ARTIFACTS = 2
+
+
+def build_joined_points(hurdat2_path=HURDAT2_FILE, county_shapefile=COUNTY_SHAPEFILE, county_excel=COUNTY_EXCEL,
+                        storm_ids=None):
+    """
+    Parse the HURDAT2 file and join every track fix to the coastal counties.
+    Args:
+        storm_ids (iterable or None): ATCF ids of the storms to build. If None, builds every storm.
+    Returns:
+        pd.DataFrame: Track table in the compact schema of track_schema.TRACK_DTYPES.
+    """
+    # Category, storm key, timestamp, day of year and ISO week are all derived here, once
+    df = derive_track_columns(read_hurdat2(hurdat2_path, storm_ids=storm_ids))
+    joined = match_hurricane_points_to_counties(df, county_shapefile=county_shapefile, county_excel=county_excel)
+    return apply_track_dtypes(joined).reset_index(drop=True)
+
+
+def update_joined_points(joined, storm_digests, hurdat2_path=HURDAT2_FILE, county_shapefile=COUNTY_SHAPEFILE,
+                         county_excel=COUNTY_EXCEL):
+    """
+    Bring a joined track table up to date with a new HURDAT2 file by parsing and
+    county-joining only the storms that were added or changed since it was built.
+    Args:
+        joined (pd.DataFrame): Track table built from an earlier HURDAT2 file.
+        storm_digests (dict): Storm id -> content digest of that earlier file (see storm_content_digests).
+        hurdat2_path (str): Path to the new HURDAT2 file.
+    Returns:
+        tuple: (pd.DataFrame, dict) the track table for the new file, in file order,
+               and the storm digests of the new file.
+    """
+    new_digests = storm_content_digests(hurdat2_path)
+    changed = [storm_id for storm_id, digest in new_digests.items() if storm_digests.get(storm_id) != digest]
+    # Keep rows of storms that are unchanged; changed and withdrawn storms are dropped
+    unchanged = set(new_digests) - set(changed)
+    parts = [joined[joined['storm_id'].isin(unchanged)]]
+    if changed:
+        parts.append(build_joined_points(hurdat2_path, county_shapefile, county_excel, storm_ids=changed))
+    updated = pd.concat(parts)
+    # Restore file order; the stable sort keeps each storm's fixes in order
+    storm_order = {storm_id: i for i, storm_id in enumerate(new_digests)}
+    order = updated['storm_id'].map(storm_order).to_numpy()
+    updated = updated.iloc[order.argsort(kind='stable')].reset_index(drop=True)
+    # concat falls back to object columns when the categories differ
+    return apply_track_dtypes(updated), new_digests
+
+
+def _latest_artifact(county_key, cache_dir):
+    """Most recently written joined table (and its storm manifest) built against the same county inputs."""
+    manifests = glob.glob(os.path.join(cache_dir, f'storms-{county_key}-*.json'))
+    for manifest in sorted(manifests, key=os.path.getmtime, reverse=True):
+        key = os.path.basename(manifest)[len('storms-'):-len('.json')]
+        path = cache_path('joined', key, cache_dir=cache_dir)
+        if os.path.exists(path):
+            with open(manifest) as f:
+                return path, json.load(f)
+    return None, None
+
+
+def load_joined_points(hurdat2_path=HURDAT2_FILE, county_shapefile=COUNTY_SHAPEFILE,
+                       county_excel=COUNTY_EXCEL, cache_dir=CACHE_DIR, incremental=True):
+    """
+    Load the county-joined track table from the on-disk cache, rebuilding it only
+    when the HURDAT2 file, the county shapefile or the coastline Excel list changed.
+    Args:
+        hurdat2_path (str): Path to the HURDAT2 file.
+        county_shapefile (str): Path to US counties shapefile.
+        county_excel (str): Path to coastal counties Excel file.
+        cache_dir (str): Directory holding the cached artifacts.
+        incremental (bool): When only the HURDAT2 file changed, splice the added and changed
+                            storms into the latest cached table instead of rebuilding it.
+    Returns:
+        pd.DataFrame: Track table in the compact schema of track_schema.TRACK_DTYPES, with the
+                      cache key of its inputs in attrs['dataset_version'].
+    """
+    county_key = input_digest([*shapefile_paths(county_shapefile), county_excel], CACHE_VERSION)
+    key = f'{county_key}-{input_digest([hurdat2_path], CACHE_VERSION)}'
+    path = cache_path('joined', key, cache_dir=cache_dir)
+    if os.path.exists(path):
+        joined = pd.read_parquet(path)
+        joined.attrs['dataset_version'] = key
+        return joined
+    base_path, base_digests = _latest_artifact(county_key, cache_dir) if incremental else (None, None)
+    if base_path is not None:
+        joined, digests = update_joined_points(
+            pd.read_parquet(base_path), base_digests, hurdat2_path, county_shapefile, county_excel
+        )
+    else:
+        joined = build_joined_points(hurdat2_path, county_shapefile, county_excel)
+        digests = storm_content_digests(hurdat2_path)
+    write_parquet_atomic(joined, path)
+    write_json_atomic(digests, cache_path('storms', key, ext='json', cache_dir=cache_dir))
+    # Tables of earlier HURDAT2 revisions are never read again once a newer one exists
+    prune_artifacts('joined', keep=KEEP_ARTIFACTS, cache_dir=cache_dir)
+    prune_artifacts('storms', ext='json', keep=KEEP_ARTIFACTS, cache_dir=cache_dir)
+    joined.attrs['dataset_version'] = key
+    return joined
+
+
+if __name__ == "__main__":
+    import tempfile
+    for attempt in ['cold', 'warm']:
+        start = time.perf_counter()
+        joined = load_joined_points()
+        print(f"{attempt} load: {len(joined)} points in {time.perf_counter() - start:.3f}s")
+
+    # Successive HURDAT2 revisions (the last storms withdrawn one at a time) leave only
+    # the newest KEEP_ARTIFACTS tables and manifests in the cache. The directory name
+    # looks like an artifact name, which must not confuse the manifest -> table lookup
+    with open(HURDAT2_FILE) as f:
+        lines = f.readlines()
+    headers = [i for i, line in enumerate(lines) if line[:2].isalpha()]
+    with tempfile.TemporaryDirectory(prefix='storms-') as cache_dir:
+        for revision, header in enumerate([len(lines), *headers[:-5:-1]]):
+            revised = os.path.join(cache_dir, f'hurdat2-{revision}.txt')
+            with open(revised, 'w') as f:
+                f.writelines(lines[:header])
+            before = set(os.listdir(cache_dir))
+            joined = load_joined_points(revised, cache_dir=cache_dir)
+            removed = sorted(before - set(os.listdir(cache_dir)))
+            county_key = joined.attrs['dataset_version'].split('-')[0]
+            assert _latest_artifact(county_key, cache_dir)[0] == cache_path(
+                'joined', joined.attrs['dataset_version'], cache_dir=cache_dir)
+            print(f"revision {revision}: {joined['storm_id'].nunique()} storms, removed {removed or 'nothing'}")
+        artifacts = [name for name in os.listdir(cache_dir) if name.startswith(('joined-', 'storms-'))]
+        assert len(artifacts) == 2 * KEEP_ARTIFACTS, artifacts
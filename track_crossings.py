@@ -0,0 +1,177 @@
+import time
+import numpy as np
+import pandas as pd
+import shapely
+from county_locator import COUNTY_COLUMNS, get_county_locator
+
+# Fractions along a segment closer than this to 0 or 1 count as its start or end
+_FRACTION_TOLERANCE = 1e-9
+
+CROSSING_COLUMNS = [
+    'storm_id', 'hurricane_id', 'county', *COUNTY_COLUMNS,
+    'entry_time', 'exit_time', 'entry_latitude', 'entry_longitude', 'exit_latitude', 'exit_longitude',
+]
+
+
+def track_segments(df):
+    """
+    Consecutive fix-to-fix segments of every storm.
+    Args:
+        df (pd.DataFrame): Track table, each storm's fixes contiguous and in time order.
+    Returns:
+        np.ndarray: Row positions of the segment start fixes; each segment ends at the next row.
+    """
+    storm = df['storm_id'].to_numpy()
+    return np.flatnonzero(storm[:-1] == storm[1:])
+
+
+def _segment_pieces(x0, y0, x1, y1, locator):
+    """
+    Intersect every segment with the county polygons.
+    Returns:
+        tuple: Segment positions, county indices and entry/exit fractions (0-1 along the
+               segment) of every piece of a segment lying inside a county.
+    """
+    segments = shapely.linestrings(np.stack([np.stack([x0, y0], axis=1), np.stack([x1, y1], axis=1)], axis=1))
+    seg_idx, county_idx = locator.tree.query(segments, predicate='intersects')
+    overlap = shapely.intersection(segments[seg_idx], locator.geometries[county_idx])
+    # A segment may enter and leave the same county several times, or only touch it
+    parts, part_pair = shapely.get_parts(overlap, return_index=True)
+    is_line = shapely.get_type_id(parts) == shapely.GeometryType.LINESTRING
+    parts, part_pair = parts[is_line], part_pair[is_line]
+    seg_idx, county_idx = seg_idx[part_pair], county_idx[part_pair]
+
+    # Project both ends of each piece back onto the straight segment
+    start = shapely.get_coordinates(shapely.get_point(parts, 0))
+    end = shapely.get_coordinates(shapely.get_point(parts, -1))
+    dx, dy = x1[seg_idx] - x0[seg_idx], y1[seg_idx] - y0[seg_idx]
+    length2 = dx * dx + dy * dy
+    frac_start = ((start[:, 0] - x0[seg_idx]) * dx + (start[:, 1] - y0[seg_idx]) * dy) / length2
+    frac_end = ((end[:, 0] - x0[seg_idx]) * dx + (end[:, 1] - y0[seg_idx]) * dy) / length2
+    entry = np.clip(np.minimum(frac_start, frac_end), 0, 1)
+    exit_ = np.clip(np.maximum(frac_start, frac_end), 0, 1)
+    return seg_idx, county_idx, entry, exit_
+
+
+def find_county_crossings(df, locator=None):
+    """
+    Find every coastal county a storm passes through along its track, including
+    counties crossed between two fixes that both lie outside them.
+
+    Each fix-to-fix segment is treated as a straight line in lat/lon and intersected
+    with the county polygons (through the locator's STRtree). Pieces in the same county
+    on consecutive segments are merged into one pass, and entry and exit times are
+    interpolated linearly along the segments.
+    Args:
+        df (pd.DataFrame): Track table with 'storm_id', 'hurricane_id', 'timestamp',
+                           'latitude' and 'longitude', each storm's fixes contiguous and in time order.
+        locator (CountyLocator or None): County index to intersect with; defaults to all coastal counties.
+    Returns:
+        pd.DataFrame: One row per pass of a storm through a county, with CROSSING_COLUMNS,
+                      ordered by storm and entry time.
+    """
+    locator = get_county_locator() if locator is None else locator
+    x = df['longitude'].to_numpy(dtype=np.float64)
+    y = df['latitude'].to_numpy(dtype=np.float64)
+    t = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+
+    first = track_segments(df)
+    # Zero-length segments (stationary storms) cannot cross anything
+    moving = first[(x[first] != x[first + 1]) | (y[first] != y[first + 1])]
+    seg_idx, county_idx, entry, exit_ = _segment_pieces(
+        x[moving], y[moving], x[moving + 1], y[moving + 1], locator
+    )
+    start_row = moving[seg_idx]
+    storm_row = np.searchsorted(moving, start_row)  # rank among the moving segments
+
+    # Merge pieces that continue: same storm and county, and either the previous piece runs
+    # to the end of its segment and this one starts at the beginning of the next segment,
+    # or both lie on the same segment and this one starts where the previous one ends
+    # (a track running along a county edge comes back split at the edge's vertices)
+    storm_codes = pd.factorize(df['storm_id'])[0]
+    order = np.lexsort((entry, storm_row, county_idx, storm_codes[start_row]))
+    start_row, storm_row, county_idx = start_row[order], storm_row[order], county_idx[order]
+    entry, exit_ = entry[order], exit_[order]
+    continues = np.zeros(len(order), dtype=bool)
+    same_storm = storm_codes[start_row[1:]] == storm_codes[start_row[:-1]]
+    same_county = county_idx[1:] == county_idx[:-1]
+    across_fix = (
+        (storm_row[1:] == storm_row[:-1] + 1) &
+        (exit_[:-1] >= 1 - _FRACTION_TOLERANCE) &
+        (entry[1:] <= _FRACTION_TOLERANCE)
+    )
+    along_segment = (storm_row[1:] == storm_row[:-1]) & (entry[1:] <= exit_[:-1] + _FRACTION_TOLERANCE)
+    continues[1:] = same_storm & same_county & (across_fix | along_segment)
+    pass_start = np.flatnonzero(~continues)
+    pass_end = np.append(pass_start[1:], len(order)) - 1
+
+    def interpolate(values, rows, frac):
+        return values[rows] + (values[rows + 1] - values[rows]) * frac
+
+    entry_rows, exit_rows = start_row[pass_start], start_row[pass_end]
+    county = county_idx[pass_start]
+    crossings = pd.DataFrame({
+        'storm_id': df['storm_id'].to_numpy()[entry_rows],
+        'hurricane_id': df['hurricane_id'].to_numpy()[entry_rows],
+        'county': county.astype(np.int32),
+    })
+    crossings = pd.concat([crossings, locator.county_columns(county)], axis=1)
+    crossings['entry_time'] = np.round(interpolate(t, entry_rows, entry[pass_start])).astype('datetime64[ms]')
+    crossings['exit_time'] = np.round(interpolate(t, exit_rows, exit_[pass_end])).astype('datetime64[ms]')
+    crossings['entry_latitude'] = interpolate(y, entry_rows, entry[pass_start])
+    crossings['entry_longitude'] = interpolate(x, entry_rows, entry[pass_start])
+    crossings['exit_latitude'] = interpolate(y, exit_rows, exit_[pass_end])
+    crossings['exit_longitude'] = interpolate(x, exit_rows, exit_[pass_end])
+    crossings = crossings.iloc[np.lexsort((crossings['entry_time'].to_numpy(), entry_rows))]
+    return crossings[CROSSING_COLUMNS].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import geopandas as gpd
+    from county_locator import CountyLocator
+    from track_cache import load_joined_points
+    df = load_joined_points()
+    locator = get_county_locator()
+    start = time.perf_counter()
+    crossings = find_county_crossings(df, locator)
+    seconds = time.perf_counter() - start
+    print(f"{len(track_segments(df))} segments -> {len(crossings)} county passes in {seconds:.2f}s")
+    print(crossings.head(10).to_string())
+
+    # A track running along a county edge with several vertices is one pass
+    edge_county = shapely.Polygon([(-82, 29), (-81, 29), (-81, 29.5), (-81, 30), (-81, 30.5), (-81, 31), (-82, 31)])
+    edge_locator = CountyLocator(gpd.GeoDataFrame(
+        {'state_county_fips': ['12000'], 'state_name': ['Florida'], 'county_name': ['Edge County'],
+         'region': ['Atlantic']}, geometry=[edge_county], crs='EPSG:4326'))
+    along_edge = pd.DataFrame({
+        'storm_id': 'AL012000', 'hurricane_id': 'AL012000',
+        'timestamp': pd.to_datetime(['2000-08-01 00:00', '2000-08-01 06:00', '2000-08-01 12:00']),
+        'latitude': [28.5, 30.2, 31.5], 'longitude': [-81.0, -81.0, -81.0],
+    })
+    edge_crossings = find_county_crossings(along_edge, edge_locator)
+    assert len(edge_crossings) == 1, edge_crossings
+    assert edge_crossings[['entry_latitude', 'exit_latitude']].iloc[0].tolist() == [29.0, 31.0]
+
+    # A segment crossing two adjacent counties is one pass through each
+    adjacent_locator = CountyLocator(gpd.GeoDataFrame(
+        {'state_county_fips': ['12001', '12002'], 'state_name': ['Florida', 'Florida'],
+         'county_name': ['West County', 'East County'], 'region': ['Atlantic', 'Atlantic']},
+        geometry=[shapely.box(-82, 29, -81, 30), shapely.box(-81, 29, -80, 30)], crs='EPSG:4326'))
+    across_counties = pd.DataFrame({
+        'storm_id': 'AL022000', 'hurricane_id': 'AL022000',
+        'timestamp': pd.to_datetime(['2000-08-02 00:00', '2000-08-02 06:00']),
+        'latitude': [29.5, 29.5], 'longitude': [-82.5, -79.5],
+    })
+    adjacent_crossings = find_county_crossings(across_counties, adjacent_locator)
+    assert adjacent_crossings['county_name'].astype(str).tolist() == ['West County', 'East County'], adjacent_crossings
+    assert (adjacent_crossings['exit_time'] > adjacent_crossings['entry_time']).all()
+
+    # Storm/county pairs the 6-hourly fixes miss
+    by_fix = set(zip(df['storm_id'], df['state_county_fips'].astype(object)))
+    by_segment = set(zip(crossings['storm_id'], crossings['state_county_fips'].astype(object)))
+    by_fix = {pair for pair in by_fix if isinstance(pair[1], str)}
+    print(f"storm/county pairs from fixes: {len(by_fix)}, from segments: {len(by_segment)}, "
+          f"only from segments: {len(by_segment - by_fix)}, only from fixes: {len(by_fix - by_segment)}")
+    by_fix_region = df.dropna(subset=['region']).groupby('region', observed=True)['storm_id'].nunique()
+    by_segment_region = crossings.groupby('region', observed=True)['storm_id'].nunique()
+    print(pd.DataFrame({'storms by fix': by_fix_region, 'storms by segment': by_segment_region}))
@@ -0,0 +1,99 @@
+import time
+import numpy as np
+
+# Screen tolerance (pixels) by number of storms drawn together: one storm keeps every fix
+STORM_COUNT_PIXELS = [(1, 0.0), (10, 0.5), (50, 1.0), (200, 2.0), (1000, 3.0)]
+TILE_SIZE = 256
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    """Planar distance from points p to segments a-b (all arrays, degrees)."""
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / np.where(length2 > 0, length2, 1), 0, 1)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def track_significance(longitude, latitude, breaks):
+    """
+    Douglas-Peucker significance of every vertex of many polylines at once.
+
+    The Douglas-Peucker split tree does not depend on the tolerance, only where it stops,
+    so it is built once: each vertex gets the largest tolerance at which it is still kept.
+    Simplifying at tolerance t is then `significance > t`, and the kept sets are nested.
+    All pieces are processed together, one tree level per iteration.
+    Args:
+        longitude (np.ndarray): Vertex x coordinates (degrees).
+        latitude (np.ndarray): Vertex y coordinates (degrees).
+        breaks (np.ndarray): Boolean mask of vertices that are always kept and split the
+                             polylines into independent pieces (track ends, category changes).
+    Returns:
+        np.ndarray: float32 significance in degrees per vertex, inf at the breaks.
+    """
+    x = np.asarray(longitude, dtype=np.float64)
+    y = np.asarray(latitude, dtype=np.float64)
+    significance = np.zeros(len(x), dtype=np.float64)
+    significance[breaks] = np.inf
+    anchors = np.flatnonzero(breaks)
+    start, end = anchors[:-1], anchors[1:]
+    parent = np.full(len(start), np.inf)
+    while len(start):
+        interior = end - start - 1
+        open_ = interior > 0
+        start, end, parent, interior = start[open_], end[open_], parent[open_], interior[open_]
+        if not len(start):
+            break
+        owner = np.repeat(np.arange(len(start)), interior)
+        idx = np.arange(interior.sum()) - np.repeat(np.cumsum(interior) - interior, interior) + start[owner] + 1
+        distance = _segment_distance(x[idx], y[idx], x[start[owner]], y[start[owner]], x[end[owner]], y[end[owner]])
+        # Farthest vertex of each piece (first one on ties)
+        order = np.lexsort((-distance, owner))
+        first = order[np.r_[0, np.flatnonzero(np.diff(owner[order])) + 1]]
+        split = idx[first]
+        # A vertex is never kept once its parent piece is no longer split
+        split_significance = np.minimum(distance[first], parent)
+        significance[split] = split_significance
+        start, end = np.concatenate([start, split]), np.concatenate([split, end])
+        parent = np.concatenate([split_significance, split_significance])
+    return significance.astype(np.float32)
+
+
+def track_breaks(storm_codes, category):
+    """Vertices every simplification keeps: first and last fix of each storm and category changes."""
+    new_storm = np.diff(storm_codes, prepend=-1) != 0
+    last_fix = np.append(new_storm[1:], True)
+    category_change = np.diff(category, prepend=-1) != 0
+    return new_storm | last_fix | category_change
+
+
+def track_tolerance(n_storms, zoom=4):
+    """
+    Simplification tolerance in degrees for a map showing n_storms tracks at a zoom level:
+    a screen tolerance that grows with the number of storms, converted with the width of a
+    Web Mercator pixel at that zoom.
+    """
+    pixels = 0.0
+    for count, tolerance_pixels in STORM_COUNT_PIXELS:
+        if n_storms >= count:
+            pixels = tolerance_pixels
+    return pixels * 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+if __name__ == "__main__":
+    from track_cache import load_joined_points
+    df = load_joined_points()
+    breaks = track_breaks(df['storm_id'].cat.codes.to_numpy(), df['category'].to_numpy())
+    start = time.perf_counter()
+    track_significance(df['longitude'].to_numpy(), df['latitude'].to_numpy(), breaks)
+    print(f"significance of {len(df)} fixes in {time.perf_counter() - start:.3f}s")
+    # Storm ends and category changes survive every tolerance
+    assert np.isinf(df['significance'].to_numpy()[breaks]).all()
+
+    # Vertices drawn for the multi-decade views of the Atlantic Impact page
+    for start_year, end_year in [(2015, 2024), (1975, 2024), (1851, 2024)]:
+        window = df[(df['year'] >= start_year) & (df['year'] <= end_year)]
+        n_storms = window['hurricane_id'].nunique()
+        tolerance = track_tolerance(n_storms)
+        kept = (window['significance'] > tolerance).sum()
+        print(f"{start_year}-{end_year}: {n_storms} storms, tolerance {tolerance:.3f} deg, "
+              f"{len(window)} -> {kept} vertices ({len(window) / kept:.1f}x fewer)")
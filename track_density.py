@@ -0,0 +1,179 @@
+import time
+import numpy as np
+from folium.plugins import HeatMap
+from track_interpolation import interpolate_tracks
+
+# Grid extent (lon_min, lat_min, lon_max, lat_max) and cell side, both in degrees
+DENSITY_BOUNDS = (-110.0, 0.0, 20.0, 72.0)
+DENSITY_RESOLUTION = 2.0
+N_CATEGORIES = 6
+# Storms are binned by the coastal regions they crossed: Atlantic only, Gulf only, both
+REGION_GROUPS = ['Atlantic', 'Gulf of Mexico', 'Both']
+# Region filter of the pages -> groups whose storms it shows
+DENSITY_REGIONS = {
+    'Any': [0, 1, 2],
+    'Atlantic': [0, 2],
+    'Gulf of Mexico': [1, 2],
+    'Both': [2],
+}
+
+
+def storm_region_groups(storm_codes, region, n_storms):
+    """
+    Index into REGION_GROUPS of every storm from the regions of its fixes
+    (-1 for storms that crossed no coastal county).
+    """
+    flags = np.zeros(n_storms, dtype=np.int8)
+    np.bitwise_or.at(flags, storm_codes, (region == 'Atlantic') * 1 + (region == 'Gulf of Mexico') * 2)
+    return flags.astype(np.int64) - 1
+
+
+class TrackDensity:
+    """
+    Track fixes counted on a lat/lon grid, per year, minimum category and storm region group.
+
+    Counts are kept per year, so a year range is a sum over a slice of the first axis
+    and costs the same whatever its length; no fix is touched after the grid is built.
+    The category axis is cumulative: counts[:, c] holds the fixes at or above category c,
+    so the storms' region groups can depend on the category floor as well.
+    """
+
+    def __init__(self, counts, first_year, bounds=DENSITY_BOUNDS, resolution=DENSITY_RESOLUTION):
+        """
+        Args:
+            counts (np.ndarray): uint16 (years, N_CATEGORIES, REGION_GROUPS, n_lat, n_lon) counts,
+                                 the second axis being the minimum category.
+            first_year (int): Year of counts[0].
+        """
+        self.counts = counts
+        self.first_year = first_year
+        self.bounds = bounds
+        self.resolution = resolution
+
+    @classmethod
+    def build(cls, df, cadence=None, floor_regions=False, bounds=DENSITY_BOUNDS, resolution=DENSITY_RESOLUTION):
+        """
+        Count the fixes of a track table, in one bincount over flat cell indices per category floor.
+        Args:
+            df (pd.DataFrame): Track table with 'storm_id', 'timestamp', 'year', 'latitude',
+                               'longitude', 'category', 'wind_speed' and 'region'.
+            cadence (str or None): Count samples interpolated at this cadence
+                                   (see track_interpolation) instead of the fixes.
+            floor_regions (bool): Group storms by the regions of their fixes at or above each
+                                  category floor, like the track filter of the All Hurricanes page,
+                                  instead of by the regions of all their fixes.
+        """
+        storm_codes = df['storm_id'].cat.codes.to_numpy()
+        n_storms = len(df['storm_id'].cat.categories)
+        region = df['region'].to_numpy(dtype=object)
+        row_category = df['category'].to_numpy()
+        # Fixes matching several counties appear once per county; count them once
+        fixes = df[~df.duplicated(['storm_id', 'timestamp'])]
+        if cadence is not None:
+            fixes = interpolate_tracks(fixes, cadence)
+        first_year = int(df['year'].min())
+        n_years = int(df['year'].max()) - first_year + 1
+        lon_min, lat_min, lon_max, lat_max = bounds
+        n_lat = int(round((lat_max - lat_min) / resolution))
+        n_lon = int(round((lon_max - lon_min) / resolution))
+
+        fix_storm = fixes['storm_id'].cat.codes.to_numpy()
+        row = np.floor((fixes['latitude'].to_numpy(np.float64) - lat_min) / resolution).astype(np.int64)
+        col = np.floor((fixes['longitude'].to_numpy(np.float64) - lon_min) / resolution).astype(np.int64)
+        year = fixes['year'].to_numpy().astype(np.int64) - first_year
+        category = fixes['category'].to_numpy().astype(np.int64)
+        on_grid = (row >= 0) & (row < n_lat) & (col >= 0) & (col < n_lon)
+
+        shape = (n_years, N_CATEGORIES, len(REGION_GROUPS), n_lat, n_lon)
+        counts = np.zeros(shape, dtype=np.uint16)
+        groups = storm_region_groups(storm_codes, region, n_storms)
+        for floor in range(N_CATEGORIES):
+            if floor_regions:
+                above = row_category >= floor
+                groups = storm_region_groups(storm_codes[above], region[above], n_storms)
+            group = groups[fix_storm]
+            keep = on_grid & (group >= 0) & (category >= floor)
+            flat = ((year[keep] * len(REGION_GROUPS) + group[keep]) * n_lat + row[keep]) * n_lon + col[keep]
+            counts[:, floor] = np.bincount(flat, minlength=n_years * len(REGION_GROUPS) * n_lat * n_lon).reshape(
+                (n_years, len(REGION_GROUPS), n_lat, n_lon))
+        return cls(counts, first_year, bounds, resolution)
+
+    def grid(self, start_year, end_year, region='Any', min_category=0):
+        """
+        Counts per cell for a year range, the storms of a region filter and fixes
+        at or above a category.
+        Returns:
+            np.ndarray: int64 (n_lat, n_lon) counts, row 0 at the southern edge.
+        """
+        years = slice(max(start_year - self.first_year, 0), max(end_year - self.first_year + 1, 0))
+        counts = self.counts[years, min_category].sum(axis=0, dtype=np.int64)
+        return counts[DENSITY_REGIONS[region]].sum(axis=0)
+
+    def cell_centers(self):
+        """Latitudes of the grid rows and longitudes of its columns, at the cell centers."""
+        lon_min, lat_min, _, _ = self.bounds
+        _, _, _, n_lat, n_lon = self.counts.shape
+        return (lat_min + (np.arange(n_lat) + 0.5) * self.resolution,
+                lon_min + (np.arange(n_lon) + 0.5) * self.resolution)
+
+    def heat_points(self, start_year, end_year, region='Any', min_category=0):
+        """
+        [lat, lon, weight] of every non-empty cell, weights log-scaled to 0-1 so single
+        tracks stay visible next to the busiest cells.
+        """
+        counts = self.grid(start_year, end_year, region, min_category)
+        rows, cols = np.nonzero(counts)
+        if not len(rows):
+            return []
+        latitude, longitude = self.cell_centers()
+        weight = np.log1p(counts[rows, cols]) / np.log1p(counts.max())
+        return np.column_stack([latitude[rows], longitude[cols], np.round(weight, 3)]).tolist()
+
+
+def plot_track_density(m, density, start_year, end_year, region='Any', min_category=0):
+    """
+    Draw the density of the matching fixes on a folium map as one heat layer.
+    Returns:
+        int: Number of fixes counted.
+    """
+    HeatMap(density.heat_points(start_year, end_year, region, min_category),
+            radius=18, blur=15, min_opacity=0.3).add_to(m)
+    return int(density.grid(start_year, end_year, region, min_category).sum())
+
+
+if __name__ == "__main__":
+    import folium
+    from track_cache import load_joined_points
+    df = load_joined_points()
+    for cadence in [None, '1h']:
+        start = time.perf_counter()
+        density = TrackDensity.build(df, cadence)
+        print(f"cadence {cadence}: grid {density.counts.shape} ({density.counts.nbytes / 2**20:.1f} MiB) "
+              f"built in {time.perf_counter() - start:.2f}s")
+
+    # The grids agree with counting the fixes directly, with storm regions taken from
+    # all their fixes or only from those at or above the category floor
+    start_year, end_year, min_category = 1990, 2010, 1
+    fixes = df.drop_duplicates(['storm_id', 'timestamp'])
+    lon_min, lat_min, lon_max, lat_max = DENSITY_BOUNDS
+    for floor_regions in [False, True]:
+        density = TrackDensity.build(df, floor_regions=floor_regions)
+        region_rows = df[df['category'] >= min_category] if floor_regions else df
+        regions = region_rows.groupby('storm_id', observed=True)['region'].apply(set)
+        atlantic = regions.index[regions.map(lambda r: 'Atlantic' in r)]
+        window = fixes[fixes['year'].between(start_year, end_year) & (fixes['category'] >= min_category)
+                       & fixes['storm_id'].isin(atlantic)]
+        expected, _, _ = np.histogram2d(window['latitude'], window['longitude'],
+                                        bins=[np.arange(lat_min, lat_max + 1e-9, DENSITY_RESOLUTION),
+                                              np.arange(lon_min, lon_max + 1e-9, DENSITY_RESOLUTION)])
+        assert np.array_equal(density.grid(start_year, end_year, 'Atlantic', min_category), expected), floor_regions
+
+    # Query and render time is flat in the length of the year range
+    last_year = int(df['year'].max())
+    for first_year in [last_year - 9, last_year - 49, int(df['year'].min())]:
+        start = time.perf_counter()
+        m = folium.Map(location=[30, -80], zoom_start=4)
+        n_fixes = plot_track_density(m, density, first_year, last_year)
+        html = m.get_root().render()
+        print(f"{first_year}-{last_year}: {n_fixes} fixes, {time.perf_counter() - start:.3f}s, "
+              f"{len(html) / 2**10:.0f} KiB of HTML")
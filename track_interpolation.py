@@ -0,0 +1,140 @@
+import time
+import numpy as np
+import pandas as pd
+from county_locator import get_county_grid
+from track_schema import categorize_wind, frame_memory_mb, iso_calendar_fields
+
+# Storm-level columns carried over from the fixes by storm, without interpolation
+STORM_COLUMNS = ['storm_id', 'storm_key', 'hurricane_id', 'name', 'year']
+# Fix-level columns interpolated linearly in time
+LINEAR_COLUMNS = ['wind_speed', 'pressure']
+
+
+def _to_unit_vectors(latitude, longitude):
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def great_circle_interpolate(lat0, lon0, lat1, lon1, fraction):
+    """
+    Points a fraction of the way along the great circle between two positions (slerp).
+    All arguments are arrays in degrees (fraction 0-1); returns (latitude, longitude) in degrees.
+    """
+    a = _to_unit_vectors(lat0, lon0)
+    b = _to_unit_vectors(lat1, lon1)
+    omega = np.arccos(np.clip((a * b).sum(axis=-1), -1.0, 1.0))
+    sin_omega = np.sin(omega)
+    # Coincident positions: fall back to linear weights
+    close = sin_omega < 1e-12
+    safe = np.where(close, 1.0, sin_omega)
+    wa = np.where(close, 1 - fraction, np.sin((1 - fraction) * omega) / safe)
+    wb = np.where(close, fraction, np.sin(fraction * omega) / safe)
+    p = wa[:, None] * a + wb[:, None] * b
+    latitude = np.degrees(np.arctan2(p[:, 2], np.hypot(p[:, 0], p[:, 1])))
+    longitude = np.degrees(np.arctan2(p[:, 1], p[:, 0]))
+    return latitude, longitude
+
+
+def interpolate_tracks(df, cadence='1h'):
+    """
+    Resample every storm's track to a fixed cadence in one pass over all storms.
+
+    Output times are the multiples of `cadence` between each storm's first and last fix.
+    Positions follow the great circle between the surrounding fixes, wind speed and
+    pressure (when present) are interpolated linearly, and category, day of year and
+    ISO week are derived again from the interpolated values.
+    Args:
+        df (pd.DataFrame): Track table (see track_schema.TRACK_DTYPES), each storm's fixes
+                           contiguous and in time order. A 'pressure' column is optional.
+        cadence (str): Pandas timedelta string, e.g. '1h' or '15min'.
+    Returns:
+        pd.DataFrame: One row per storm and output time, storm columns as categoricals,
+                      positions, wind and pressure as float32.
+    """
+    step = pd.Timedelta(cadence) // pd.Timedelta('1ms')
+    t = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    storm_codes = pd.factorize(df['storm_id'])[0]
+    first_row = np.flatnonzero(np.diff(storm_codes, prepend=-1) != 0)
+    last_row = np.append(first_row[1:], len(df)) - 1
+
+    # Output times per storm, from offsets into one flat array (no loop over storms)
+    grid_start = -(-t[first_row] // step) * step
+    counts = np.maximum((t[last_row] - grid_start) // step + 1, 0)
+    offsets = np.cumsum(counts) - counts
+    storm = np.repeat(np.arange(len(first_row)), counts)
+    times = grid_start[storm] + step * (np.arange(counts.sum()) - offsets[storm])
+
+    # Bracketing fixes: search a key that increases across storms and within each storm
+    span = int((t[last_row] - t[first_row]).max()) + 1
+    fix_key = storm_codes.astype(np.int64) * span + (t - t[first_row][storm_codes])
+    out_key = storm.astype(np.int64) * span + (times - t[first_row][storm])
+    before = np.clip(np.searchsorted(fix_key, out_key, side='right') - 1, first_row[storm], last_row[storm])
+    after = np.minimum(before + 1, last_row[storm])
+    gap = t[after] - t[before]
+    fraction = np.where(gap > 0, (times - t[before]) / np.where(gap > 0, gap, 1), 0.0)
+
+    latitude, longitude = great_circle_interpolate(
+        df['latitude'].to_numpy(np.float64)[before], df['longitude'].to_numpy(np.float64)[before],
+        df['latitude'].to_numpy(np.float64)[after], df['longitude'].to_numpy(np.float64)[after],
+        fraction,
+    )
+    timestamp = times.astype('datetime64[ms]')
+    day_of_year, week = iso_calendar_fields(timestamp)
+    out = {}
+    for column in STORM_COLUMNS:
+        if column in df:
+            # Categoricals stay categoricals: only their codes are gathered
+            out[column] = df[column].array.take(before)
+    out.update({
+        'timestamp': timestamp,
+        'day_of_year': day_of_year.astype(np.uint16),
+        'week': week.astype(np.uint8),
+        'latitude': latitude.astype(np.float32),
+        'longitude': longitude.astype(np.float32),
+    })
+    for column in LINEAR_COLUMNS:
+        if column in df:
+            values = df[column].to_numpy(np.float32)
+            out[column] = values[before] + (values[after] - values[before]) * fraction.astype(np.float32)
+    if 'wind_speed' in out:
+        out['category'] = categorize_wind(out['wind_speed'])
+    return pd.DataFrame(out)
+
+
+def attach_counties(df, lookup=None):
+    """
+    Add the coastal county columns to a table of points with an array lookup
+    (CountyGrid by default), as categoricals built from the county index.
+    """
+    lookup = get_county_grid() if lookup is None else lookup
+    county, _ = lookup.locate(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    locator = getattr(lookup, 'locator', lookup)
+    return pd.concat([df, locator.county_columns(county)], axis=1)
+
+
+if __name__ == "__main__":
+    from hurdat2_reader import read_hurdat2
+    from track_schema import derive_track_columns
+    columns = read_hurdat2()
+    df = derive_track_columns(columns).assign(pressure=columns['pressure'])
+
+    # A 6-hourly cadence on synoptic storms gives back the fixes themselves
+    synoptic = interpolate_tracks(df, '6h')
+    fixes = df[df['timestamp'].dt.hour.isin([0, 6, 12, 18]) & (df['timestamp'].dt.minute == 0)]
+    fixes = fixes.drop_duplicates(['storm_id', 'timestamp'])
+    merged = fixes.merge(synoptic, on=['storm_id', 'timestamp'], suffixes=('', '_interp'))
+    assert len(merged) == len(fixes)
+    assert np.allclose(merged['latitude'], merged['latitude_interp'], atol=1e-4)
+    assert np.allclose(merged['longitude'], merged['longitude_interp'], atol=1e-4)
+    assert np.allclose(merged['wind_speed'], merged['wind_speed_interp'])
+
+    print(f"{len(df)} fixes, {frame_memory_mb(df):.1f} MiB")
+    for cadence in ['1h', '15min']:
+        start = time.perf_counter()
+        hourly = interpolate_tracks(df, cadence)
+        interp_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        hourly = attach_counties(hourly)
+        county_seconds = time.perf_counter() - start
+        print(f"{cadence}: {len(hourly)} points ({len(hourly) / len(df):.1f}x) in {interp_seconds:.2f}s, "
+              f"counties in {county_seconds:.2f}s, {frame_memory_mb(hourly):.1f} MiB")
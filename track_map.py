@@ -0,0 +1,200 @@
+import json
+import time
+import folium
+import numpy as np
+import pandas as pd
+from jinja2 import Template
+from track_decimation import track_tolerance
+
+# Category color map
+CATEGORY_COLORS = {
+    0: 'gray',    # Tropical Depression/Storm
+    1: 'blue',   # Category 1
+    2: 'green',  # Category 2
+    3: 'yellow', # Category 3
+    4: 'orange', # Category 4
+    5: 'red',    # Category 5
+}
+COORDINATE_DECIMALS = 4
+
+
+def _format_time(timestamps):
+    return pd.DatetimeIndex(timestamps).strftime('%Y-%m-%d %H:%M').to_numpy()
+
+
+def track_feature_collection(filtered_df, hurricane_ids):
+    """
+    GeoJSON FeatureCollection of storm tracks: one LineString per run of consecutive
+    segments with the same category, plus a start and an end Point per storm.
+    Args:
+        filtered_df (pd.DataFrame): Track table rows with 'hurricane_id', 'name', 'timestamp',
+                                    'latitude', 'longitude' and 'category'.
+        hurricane_ids (list): Storms to draw, in drawing order.
+    Returns:
+        dict: FeatureCollection; line features carry 'category' and a 'tooltip',
+              point features a 'popup'.
+    """
+    order = {hurricane_id: i for i, hurricane_id in enumerate(hurricane_ids)}
+    rank = filtered_df['hurricane_id'].map(order).astype(float).to_numpy()
+    keep = ~np.isnan(rank)
+    df = filtered_df[keep]
+    # Storms in drawing order, each storm's fixes in time order
+    sort = np.lexsort((df['timestamp'].to_numpy(), rank[keep]))
+    storm = rank[keep][sort]
+    lat = np.round(df['latitude'].to_numpy(np.float64)[sort], COORDINATE_DECIMALS)
+    lon = np.round(df['longitude'].to_numpy(np.float64)[sort], COORDINATE_DECIMALS)
+    category = df['category'].to_numpy()[sort].astype(int)
+    names = df['name'].astype(str).to_numpy()[sort]
+    times = _format_time(df['timestamp'].to_numpy()[sort])
+
+    # A segment runs from fix i to fix i + 1 and takes the category of fix i
+    segment = np.flatnonzero(storm[:-1] == storm[1:])
+    new_run = np.ones(len(segment), dtype=bool)
+    new_run[1:] = (segment[1:] != segment[:-1] + 1) | (category[segment[1:]] != category[segment[:-1]])
+    run_start = segment[new_run]
+    run_end = np.append(segment[np.flatnonzero(new_run)[1:] - 1], segment[-1:]) + 1
+
+    features = []
+    for start, end in zip(run_start, run_end):
+        cat = int(category[start])
+        features.append({
+            'type': 'Feature',
+            'properties': {
+                'category': cat,
+                'tooltip': f"{names[start]} | Cat {cat} | {times[start]} - {times[end]}",
+            },
+            'geometry': {
+                'type': 'LineString',
+                'coordinates': np.column_stack([lon[start:end + 1], lat[start:end + 1]]).tolist(),
+            },
+        })
+    first = np.flatnonzero(np.diff(storm, prepend=-1) != 0)
+    last = np.append(first[1:], len(storm)) - 1
+    for label, rows in [('Start', first), ('End', last[last != first])]:
+        for row in rows:
+            features.append({
+                'type': 'Feature',
+                'properties': {'popup': f"{label}: {names[row]} ({times[row]})"},
+                'geometry': {'type': 'Point', 'coordinates': [lon[row], lat[row]]},
+            })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+class TrackLayer(folium.MacroElement):
+    """
+    All storm tracks of a map in one Leaflet GeoJSON layer, styled by each feature's
+    category and with tooltips/popups bound in the browser.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }}_colors = {{ this.colors|tojson }};
+            var {{ this.get_name() }} = L.geoJson({{ this.geojson }}, {
+                style: function(feature) {
+                    return {
+                        color: {{ this.get_name() }}_colors[feature.properties.category] || 'black',
+                        weight: 4,
+                        opacity: 0.8
+                    };
+                },
+                onEachFeature: function(feature, layer) {
+                    if (feature.properties.tooltip) { layer.bindTooltip(feature.properties.tooltip); }
+                    if (feature.properties.popup) { layer.bindPopup(feature.properties.popup); }
+                }
+            }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, feature_collection):
+        super().__init__()
+        self._name = 'TrackLayer'
+        # A '</' in a storm name would close the inline <script> early
+        self.geojson = json.dumps(feature_collection, separators=(',', ':')).replace('</', '<\\/')
+        self.colors = {str(cat): color for cat, color in CATEGORY_COLORS.items()}
+
+
+def decimate_tracks(filtered_df, n_storms, zoom=4):
+    """
+    Fixes left after simplifying the tracks for a map of n_storms storms at a zoom level.
+    Storm ends and category changes are always kept, so runs and markers are unchanged.
+    """
+    tolerance = track_tolerance(n_storms, zoom)
+    if tolerance == 0 or 'significance' not in filtered_df:
+        return filtered_df
+    return filtered_df[filtered_df['significance'].to_numpy() > tolerance]
+
+
+def plot_hurricane_paths(m, filtered_df, hurricane_ids, zoom=4):
+    """
+    Draw the tracks of the given storms on a folium map, colored by category,
+    with start and end markers, as a single batched layer. Tracks are simplified
+    for the number of storms and the map's zoom level (see track_decimation).
+    """
+    filtered_df = decimate_tracks(filtered_df, len(hurricane_ids), zoom)
+    TrackLayer(track_feature_collection(filtered_df, hurricane_ids)).add_to(m)
+
+
+def _plot_hurricane_paths_per_segment(m, filtered_df, hurricanes_to_plot):
+    """
+    The original one-PolyLine-per-segment renderer (benchmark baseline); markers are
+    only drawn for storms with a segment, where the original raised on single-fix storms.
+    """
+    for hurricane_id in hurricanes_to_plot:
+        storm_df = filtered_df[filtered_df['hurricane_id'] == hurricane_id].sort_values('timestamp')
+        if not storm_df.empty:
+            path_points = storm_df[['latitude', 'longitude', 'category', 'name', 'timestamp']].values
+            for i in range(len(path_points) - 1):
+                latlon1 = (path_points[i][0], path_points[i][1])
+                latlon2 = (path_points[i+1][0], path_points[i+1][1])
+                cat = int(path_points[i][2])
+                name = path_points[i][3]
+                date = path_points[i][4]
+                folium.PolyLine(
+                    [latlon1, latlon2],
+                    color=CATEGORY_COLORS.get(cat, 'black'),
+                    weight=4,
+                    opacity=0.8,
+                    tooltip=f"{name} | Cat {cat} | {date}"
+                ).add_to(m)
+            # Add start and end markers
+            if len(path_points) > 1:
+                folium.Marker(
+                    (path_points[0][0], path_points[0][1]),
+                    popup=f"Start: {name} ({path_points[0][4]})"
+                ).add_to(m)
+                folium.Marker(
+                    (path_points[-1][0], path_points[-1][1]),
+                    popup=f"End: {name} ({path_points[-1][4]})"
+                ).add_to(m)
+
+
+def benchmark(df, start_year, end_year):
+    """Build and render a map of every storm in a year range with both renderers."""
+    filtered_df = df[(df['year'] >= start_year) & (df['year'] <= end_year)]
+    hurricane_ids = filtered_df['hurricane_id'].unique().tolist()
+    print(f"{start_year}-{end_year}: {len(hurricane_ids)} storms, {len(filtered_df)} fixes")
+    for label, renderer in [('PolyLine per segment', _plot_hurricane_paths_per_segment),
+                            ('batched GeoJSON', plot_hurricane_paths)]:
+        start = time.perf_counter()
+        m = folium.Map(location=[30, -80], zoom_start=4)
+        renderer(m, filtered_df, hurricane_ids)
+        html = m.get_root().render()
+        seconds = time.perf_counter() - start
+        print(f"  {label:<21} {seconds:6.2f}s, {len(html) / 2**20:6.2f} MiB of HTML")
+
+
+if __name__ == "__main__":
+    from track_cache import load_joined_points
+    df = load_joined_points()
+    # Runs must cover every segment exactly once
+    sample = df[df['year'] == df['year'].max()]
+    collection = track_feature_collection(sample, sample['hurricane_id'].unique().tolist())
+    lines = [f for f in collection['features'] if f['geometry']['type'] == 'LineString']
+    segments = len(sample) - sample['hurricane_id'].nunique()
+    assert sum(len(f['geometry']['coordinates']) - 1 for f in lines) == segments
+    # Storm names cannot end the map's <script> block
+    hostile = sample.assign(name=sample['name'].astype(str) + '</script><b>x')
+    m = folium.Map()
+    plot_hurricane_paths(m, hostile, hostile['hurricane_id'].unique().tolist())
+    assert '</script><b>' not in m.get_root().render()
+    for start_year, end_year in [(2015, 2024), (1995, 2024)]:
+        benchmark(df, start_year, end_year)
@@ -0,0 +1,186 @@
+import time
+import numpy as np
+import pandas as pd
+from track_decimation import track_breaks, track_significance
+
+# Canonical layout of the shared track table passed around the pages.
+# Repeated strings are categoricals, numbers use the narrowest dtype that holds them.
+TRACK_DTYPES = {
+    'storm_id': 'category',
+    'storm_key': 'int32',
+    'hurricane_id': 'category',
+    'name': 'category',
+    'year': 'int16',
+    'timestamp': 'datetime64[ms]',
+    'day_of_year': 'uint16',
+    'week': 'uint8',
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'category': 'int8',
+    'wind_speed': 'int16',
+    # Douglas-Peucker significance (degrees), see track_decimation.track_significance
+    'significance': 'float32',
+    # County columns kept from the spatial join (NaN when the fix matched no coastal county)
+    'state_county_fips': 'category',
+    'state_name': 'category',
+    'county_name': 'category',
+    'region': 'category',
+}
+
+# Lower bounds of Saffir-Simpson categories 1-5 in each wind unit
+SAFFIR_SIMPSON_THRESHOLDS = {
+    'knots': [64, 83, 96, 113, 137],
+    'mph': [74, 96, 111, 130, 157],
+}
+# HURDAT2 reports maximum sustained winds in knots
+HURDAT2_WIND_UNITS = 'knots'
+BASIN_CODES = {'AL': 1, 'EP': 2, 'CP': 3}
+
+
+def categorize_wind(wind, units=HURDAT2_WIND_UNITS):
+    """
+    Saffir-Simpson category (0 below hurricane strength) for an array of wind speeds.
+    Args:
+        wind (array-like): Maximum sustained wind speeds.
+        units (str): Units of `wind`, 'knots' or 'mph'; picks the matching thresholds.
+    Returns:
+        np.ndarray: int8 categories 0-5.
+    """
+    if units not in SAFFIR_SIMPSON_THRESHOLDS:
+        raise ValueError(f"Unknown wind units {units!r}, expected one of {list(SAFFIR_SIMPSON_THRESHOLDS)}")
+    return np.searchsorted(SAFFIR_SIMPSON_THRESHOLDS[units], wind, side='right').astype(np.int8)
+
+
+def storm_keys(storm_ids):
+    """
+    Stable integer key per ATCF id (basin code * 1e6 + year * 100 + storm number),
+    e.g. 'AL092024' -> 1202409. It does not depend on which storms were parsed together.
+    """
+    storm_ids = pd.Series(storm_ids, dtype=str)
+    basin = storm_ids.str[:2].map(BASIN_CODES).fillna(9).astype(np.int32)
+    return (basin * 1_000_000 + storm_ids.str[4:8].astype(np.int32) * 100 + storm_ids.str[2:4].astype(np.int32)).to_numpy()
+
+
+def _per_storm_categorical(values, storm_row):
+    """Categorical over the fixes from one value per storm, without hashing every fix."""
+    codes, categories = pd.factorize(values, sort=True)
+    return pd.Categorical.from_codes(codes[storm_row], categories=categories)
+
+
+def iso_calendar_fields(timestamp):
+    """
+    Day of year and ISO week number for an array of datetime64 values.
+    Returns:
+        tuple: (np.ndarray, np.ndarray) day of year (1-366) and ISO week (1-53).
+    """
+    days = timestamp.astype('datetime64[D]')
+    day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+    # ISO weeks start on Monday and belong to the year holding their Thursday
+    weekday = (days.astype(np.int64) + 3) % 7
+    thursday = days - weekday.astype('timedelta64[D]') + np.timedelta64(3, 'D')
+    week = (thursday - thursday.astype('datetime64[Y]')).astype(np.int64) // 7 + 1
+    return day_of_year, week
+
+
+def derive_track_columns(columns, wind_units=HURDAT2_WIND_UNITS):
+    """
+    Build the track table from parsed HURDAT2 columns, deriving every computed
+    field once with array operations.
+    Args:
+        columns (dict): Output of hurdat2_reader.read_hurdat2.
+        wind_units (str): Units of the 'wind' column, used to pick the category thresholds.
+    Returns:
+        pd.DataFrame: One row per fix with the non-county columns of TRACK_DTYPES.
+    """
+    # Per-storm fields are computed on the ~2,000 unique storms and broadcast to the fixes
+    storm_ids, first_row, storm_row = np.unique(columns['storm_id'], return_index=True, return_inverse=True)
+    raw_names = columns['name'][first_row]
+    years = columns['year'][first_row]
+    # Use storm ID as name for unnamed hurricanes
+    names = np.where(raw_names == 'UNNAMED', storm_ids, raw_names)
+    hurricane_ids = (pd.Series(names) + ' (' + pd.Series(years).astype(str) + ')').to_numpy()
+    day_of_year, week = iso_calendar_fields(columns['timestamp'])
+    category = categorize_wind(columns['wind'], wind_units)
+    # Track simplification is computed once here, for every tolerance the maps may use
+    significance = track_significance(columns['longitude'], columns['latitude'],
+                                      track_breaks(storm_row, category))
+
+    return pd.DataFrame({
+        'storm_id': pd.Categorical.from_codes(storm_row, categories=storm_ids),
+        'storm_key': storm_keys(storm_ids)[storm_row],
+        'hurricane_id': _per_storm_categorical(hurricane_ids, storm_row),
+        'name': _per_storm_categorical(names, storm_row),
+        'year': columns['year'],
+        'timestamp': columns['timestamp'],
+        'day_of_year': day_of_year,
+        'week': week,
+        'latitude': columns['latitude'],
+        'longitude': columns['longitude'],
+        'category': category,
+        'wind_speed': columns['wind'],
+        'significance': significance,
+    })
+
+
+def apply_track_dtypes(df):
+    """Select the canonical columns in order and cast them to their compact dtypes."""
+    return pd.DataFrame(df[list(TRACK_DTYPES)]).astype(TRACK_DTYPES)
+
+
+def frame_memory_mb(df):
+    """Deep memory footprint of a DataFrame in MiB."""
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def benchmark_derivation(columns):
+    """
+    Time the derivation stage against the row-wise path it replaced
+    (.apply(get_hurricane_category), string-built ids and re-parsed dates).
+    The Douglas-Peucker significance has no row-wise counterpart, so it is timed on
+    its own and left out of the comparison.
+    """
+    from hurdat2_reader import hurdat2_to_dataframe
+    from hurricane_app import get_hurricane_category
+    df = hurdat2_to_dataframe(columns)
+
+    start = time.perf_counter()
+    category = df['wind_speed'].apply(get_hurricane_category)
+    hurricane_id = df['name'] + ' (' + df['year'].astype(str) + ')'
+    week = pd.to_datetime(df['date']).dt.isocalendar().week
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    derived = derive_track_columns(columns)
+    derive_seconds = time.perf_counter() - start
+
+    breaks = track_breaks(derived['storm_id'].cat.codes.to_numpy(), derived['category'].to_numpy())
+    start = time.perf_counter()
+    track_significance(columns['longitude'], columns['latitude'], breaks)
+    significance_seconds = time.perf_counter() - start
+    vectorized_seconds = derive_seconds - significance_seconds
+
+    # Same thresholds give the same answer as the row-wise function
+    assert (categorize_wind(columns['wind'], units='mph') == category.to_numpy()).all()
+    assert (derived['hurricane_id'].astype(str).to_numpy() == hurricane_id.to_numpy()).all()
+    assert (derived['week'].to_numpy() == week.to_numpy()).all()
+    assert (derived['day_of_year'].to_numpy() == pd.to_datetime(df['date']).dt.dayofyear.to_numpy()).all()
+    print(f".apply path:       {apply_seconds * 1000:.1f} ms")
+    print(f"vectorized stage:  {vectorized_seconds * 1000:.1f} ms ({apply_seconds / vectorized_seconds:.1f}x faster)")
+    print(f"significance:      {significance_seconds * 1000:.1f} ms (not in the comparison)")
+
+
+if __name__ == "__main__":
+    from track_cache import build_joined_points
+    from hurdat2_reader import read_hurdat2, hurdat2_to_dataframe
+    from hurricane_county_matcher import match_hurricane_points_to_counties
+    columns = read_hurdat2()
+    benchmark_derivation(columns)
+    # The wide frame the pages used to share, next to the compact one
+    df = hurdat2_to_dataframe(columns)
+    df['category'] = categorize_wind(df['wind_speed'])
+    df['hurricane_id'] = df['name'] + ' (' + df['year'].astype(str) + ')'
+    wide = match_hurricane_points_to_counties(df)
+    compact = build_joined_points()
+    print(f"{len(wide)} fixes")
+    print(f"joined frame:  {frame_memory_mb(wide):.1f} MiB ({wide.shape[1]} columns)")
+    print(f"compact frame: {frame_memory_mb(compact):.1f} MiB ({compact.shape[1]} columns)")
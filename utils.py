@@ -1,12 +1,22 @@
+import time
+import numpy as np
 import pandas as pd
 
+# Regions of the presence cube; 'Both' is answered like 'Any' (a crossing of either coastline)
+PRESENCE_REGIONS = ['Atlantic', 'Gulf of Mexico', 'Any']
+N_WEEKS = 53
+N_CATEGORIES = 6
+# Days of the climatology calendar (Feb 29 is counted as Feb 28) and default kernel width
+N_DAYS = 365
+SMOOTHING_DAYS = 7
+
 def calculate_weekly_frequency(df, selected_region, start_year, end_year, min_category=0):
     """
     Calculates the weekly frequency of hurricanes that crossed coastal counties 
     within a given year range, minimum category, and region.
 
     Args:
-        df (pd.DataFrame): DataFrame containing hurricane data with 'year', 'date', 
+        df (pd.DataFrame): DataFrame containing hurricane data with 'year', 'week' (ISO week), 
                            'hurricane_id', 'category', and 'region' columns.
         selected_region (str): The region filter ('Any', 'Atlantic', 'Gulf of Mexico', 'Both').
         start_year (int): The start year for the frequency calculation.
@@ -20,7 +30,7 @@ def calculate_weekly_frequency(df, selected_region, start_year, end_year, min_ca
     df_filtered_year_cat = df[(df['year'] >= start_year) & (df['year'] <= end_year)].copy()
 
     # Only keep hurricanes that reached at least the minimum category within the selected year range
-    hurricane_max_categories_in_period = df_filtered_year_cat.groupby('hurricane_id')['category'].max()
+    hurricane_max_categories_in_period = df_filtered_year_cat.groupby('hurricane_id', observed=True)['category'].max()
     valid_hurricanes_in_period = hurricane_max_categories_in_period[hurricane_max_categories_in_period >= min_category].index
     
     # Further filter data points to only include those from valid hurricanes
@@ -40,11 +50,7 @@ def calculate_weekly_frequency(df, selected_region, start_year, end_year, min_ca
         # If region is 'Any', use all coastal crossing points within the year/category filter
         df_freq = df_coastal.copy()
         
-    # Convert date to datetime
-    df_freq['date'] = pd.to_datetime(df_freq['date'])
-    
-    # Add week number (1-53 to cover all possible ISO weeks)
-    df_freq['week'] = df_freq['date'].dt.isocalendar().week
+    # The ISO week number (1-53) is precomputed in the track table, no date parsing needed here
     
     # Count unique hurricanes per week (each hurricane counted only once per week within the filtered region and year/cat range)
     # Group by year and week to find which valid hurricanes were active in coastal regions each week
@@ -64,4 +70,371 @@ def calculate_weekly_frequency(df, selected_region, start_year, end_year, min_ca
     # Create DataFrame for plotting, merging with all weeks and filling missing values with 0
     plot_df = all_weeks_df.merge(weekly_probability.rename('Probability'), left_on='Week', right_index=True, how='left').fillna(0)
     
-    return plot_df 
\ No newline at end of file
+    return plot_df
+
+
+def _presence_region(selected_region):
+    """Index into PRESENCE_REGIONS of a region filter, as calculate_weekly_frequency reads it."""
+    if selected_region in ('Atlantic', 'Gulf of Mexico'):
+        return PRESENCE_REGIONS.index(selected_region)
+    return PRESENCE_REGIONS.index('Any')
+
+
+def coastal_presence_cube(df, period, n_periods):
+    """
+    Boolean presence cube [year, period, region, min category] of hurricanes in coastal counties.
+    Args:
+        df (pd.DataFrame): Track table with 'year', 'hurricane_id', 'category' and 'region'.
+        period (np.ndarray): 0-based period of the year (week, day, ...) of every row.
+        n_periods (int): Periods per year.
+    Returns:
+        tuple: (np.ndarray, int) the cube and the year of its first row.
+    """
+    storm = df['hurricane_id'].astype('category').cat.codes.to_numpy()
+    category = df['category'].to_numpy().astype(np.int64)
+    max_category = np.full(storm.max() + 1 if len(storm) else 0, -1, dtype=np.int64)
+    np.maximum.at(max_category, storm, category)
+
+    first_year = int(df['year'].min()) if len(df) else 0
+    n_years = int(df['year'].max()) - first_year + 1 if len(df) else 0
+    # Highest storm category seen per (year, period, region); Any takes both coastlines
+    best = np.full((n_years, n_periods, len(PRESENCE_REGIONS)), -1, dtype=np.int64)
+    region = df['region'].to_numpy(dtype=object)
+    year = df['year'].to_numpy().astype(np.int64) - first_year
+    for r, name in enumerate(PRESENCE_REGIONS[:2]):
+        rows = np.flatnonzero(region == name)
+        for target in (r, PRESENCE_REGIONS.index('Any')):
+            np.maximum.at(best, (year[rows], period[rows], target), max_category[storm[rows]])
+    return best[..., None] >= np.arange(N_CATEGORIES), first_year
+
+
+class WeeklyPresence:
+    """
+    Boolean cube of coastal hurricane presence indexed by [year, ISO week - 1, region, min category].
+
+    cube[y, w, r, c] is True when at least one hurricane of year first_year + y whose
+    maximum category is at least c had a fix in a coastal county of region r during ISO
+    week w + 1. The track table's 'year' is the storm's year, so a storm's maximum category
+    does not depend on the year range, and any calculate_weekly_frequency query becomes
+    a slice of the cube summed over years.
+    """
+
+    def __init__(self, cube, first_year):
+        self.cube = cube
+        self.first_year = first_year
+
+    @classmethod
+    def build(cls, df):
+        """
+        Args:
+            df (pd.DataFrame): Track table with 'year', 'week', 'hurricane_id', 'category' and 'region'.
+        """
+        return cls(*coastal_presence_cube(df, df['week'].to_numpy().astype(np.int64) - 1, N_WEEKS))
+
+    def presence(self, selected_region, start_year, end_year, min_category=0):
+        """
+        (years, weeks) boolean presence for a year range; years outside the data are all False.
+        """
+        n_years = end_year - start_year + 1
+        out = np.zeros((max(n_years, 0), N_WEEKS), dtype=bool)
+        if min_category > N_CATEGORIES - 1:
+            return out
+        lo = max(start_year - self.first_year, 0)
+        hi = min(end_year - self.first_year + 1, len(self.cube))
+        if hi > lo:
+            offset = lo + self.first_year - start_year
+            out[offset:offset + hi - lo] = self.cube[lo:hi, :, _presence_region(selected_region), max(min_category, 0)]
+        return out
+
+    def weekly_probability(self, selected_region, start_year, end_year, min_category=0):
+        """Share of the years in the range with a hurricane present, per ISO week (array of 53)."""
+        return self.presence(selected_region, start_year, end_year, min_category).sum(axis=0) / (end_year - start_year + 1)
+
+    def weekly_frequency(self, selected_region, start_year, end_year, min_category=0,
+                         confidence=None, n_resamples=10_000, seed=0):
+        """
+        Same result as calculate_weekly_frequency(df, selected_region, start_year, end_year,
+        min_category) for the table the cube was built from, without touching its rows.
+        Args:
+            confidence (float or None): If set (e.g. 0.9), add bootstrap percentile bounds
+                                        (see bootstrap_weekly_probability).
+        Returns:
+            pd.DataFrame: 'Week' (1-53) and 'Probability' columns, plus 'Lower' and 'Upper'
+                          when a confidence level is given.
+        """
+        presence = self.presence(selected_region, start_year, end_year, min_category)
+        table = pd.DataFrame({
+            'Week': np.arange(1, N_WEEKS + 1),
+            'Probability': presence.sum(axis=0) / (end_year - start_year + 1),
+        })
+        if confidence is not None:
+            table['Lower'], table['Upper'] = bootstrap_weekly_probability(presence, confidence, n_resamples, seed)
+        return table
+
+    def weekly_frequencies(self, regions, start_year, end_year, min_categories=(0,)):
+        """
+        Weekly probabilities of several regions and category thresholds at once, from one
+        slice of the cube. Columns are named as in calculate_weekly_frequencies.
+        Returns:
+            pd.DataFrame: 'Week' and one probability column per (region, min category).
+        """
+        n_years = end_year - start_year + 1
+        lo = max(start_year - self.first_year, 0)
+        hi = max(min(end_year - self.first_year + 1, len(self.cube)), lo)
+        region_index = [_presence_region(region) for region in regions]
+        category_index = np.clip(min_categories, 0, N_CATEGORIES - 1)
+        # (weeks, regions, categories) counts of years with a hurricane present
+        years = self.cube[lo:hi][:, :, region_index][:, :, :, category_index].sum(axis=0)
+        years[:, :, np.asarray(min_categories) > N_CATEGORIES - 1] = 0
+        table = {'Week': np.arange(1, N_WEEKS + 1)}
+        for i, region in enumerate(regions):
+            for j, min_category in enumerate(min_categories):
+                table[frequency_column(region, min_category, min_categories)] = years[:, i, j] / n_years
+        return pd.DataFrame(table)
+
+    def window_trend(self, selected_region, window=30, min_category=0, start_year=None, end_year=None):
+        """
+        Weekly probabilities of every window of consecutive years, from prefix sums over
+        the year axis: each window is the difference of two cumulative rows.
+        Args:
+            window (int): Years per window.
+            start_year, end_year (int or None): Span the windows slide over (default: the cube's years).
+        Returns:
+            tuple: (np.ndarray, np.ndarray) first year of each window and its (windows, weeks)
+                   probabilities, equal to weekly_probability over that window.
+        """
+        start_year = self.first_year if start_year is None else start_year
+        end_year = self.first_year + len(self.cube) - 1 if end_year is None else end_year
+        presence = self.presence(selected_region, start_year, end_year, min_category)
+        cumulative = np.zeros((len(presence) + 1, N_WEEKS), dtype=np.int64)
+        np.cumsum(presence, axis=0, out=cumulative[1:])
+        n_windows = max(len(presence) - window + 1, 0)
+        probabilities = (cumulative[window:window + n_windows] - cumulative[:n_windows]) / window
+        return np.arange(start_year, start_year + n_windows), probabilities
+
+
+def bootstrap_weekly_probability(presence, confidence=0.9, n_resamples=10_000, seed=0):
+    """
+    Percentile bootstrap interval of the weekly probabilities, resampling whole years.
+
+    Each resample draws the years of the range with replacement; only how many times each
+    year is drawn matters, so the drawn indices of all resamples are counted into one
+    (resamples x years) matrix, and their weekly probabilities are one matrix product
+    with the presence matrix.
+    Args:
+        presence (np.ndarray): (years, weeks) boolean presence, e.g. WeeklyPresence.presence.
+        confidence (float): Central coverage of the interval.
+        n_resamples (int): Bootstrap resamples.
+        seed (int): Seed of the random generator; the same seed gives the same bounds.
+    Returns:
+        tuple: (np.ndarray, np.ndarray) lower and upper bound per week.
+    """
+    n_years = len(presence)
+    if n_years == 0:
+        return np.zeros(presence.shape[1]), np.zeros(presence.shape[1])
+    rng = np.random.default_rng(seed)
+    draws = rng.integers(0, n_years, size=(n_resamples, n_years))
+    rows = np.arange(n_resamples)[:, None] * n_years
+    counts = np.bincount((rows + draws).ravel(), minlength=n_resamples * n_years).reshape(n_resamples, n_years)
+    probabilities = counts.astype(np.float32) @ presence.astype(np.float32) / n_years
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(probabilities, [tail, 100 - tail], axis=0)
+    return lower.astype(np.float64), upper.astype(np.float64)
+
+
+def frequency_column(region, min_category, min_categories):
+    """Column of a region/threshold in a weekly frequency table: the region, plus 'Cat N+' with several thresholds."""
+    return region if len(min_categories) == 1 else f'{region} Cat {min_category}+'
+
+
+def calculate_weekly_frequencies(df, regions, start_year, end_year, min_categories=(0,)):
+    """
+    Weekly frequencies of several regions and category thresholds in a single pass over
+    the data, each column equal to the matching calculate_weekly_frequency result.
+
+    Args:
+        df (pd.DataFrame): DataFrame with 'year', 'week', 'hurricane_id', 'category' and 'region' columns.
+        regions (list): Region filters ('Any', 'Atlantic', 'Gulf of Mexico', 'Both').
+        start_year (int): The start year for the frequency calculation.
+        end_year (int): The end year for the frequency calculation.
+        min_categories (list): Minimum Saffir-Simpson categories to include.
+
+    Returns:
+        pd.DataFrame: Wide table with 'Week' and one 'Probability' column per region and threshold,
+                      named by region (and 'Cat N+' when several thresholds are requested).
+    """
+    in_range = df[(df['year'] >= start_year) & (df['year'] <= end_year)]
+    return WeeklyPresence.build(in_range).weekly_frequencies(regions, start_year, end_year, min_categories)
+
+
+def calendar_day(timestamp):
+    """0-based day on a 365-day calendar for an array of datetime64 values; Feb 29 falls on Feb 28."""
+    days = timestamp.astype('datetime64[D]')
+    years = days.astype('datetime64[Y]')
+    day = (days - years).astype(np.int64)
+    calendar_year = years.astype(np.int64) + 1970
+    leap = (calendar_year % 4 == 0) & ((calendar_year % 100 != 0) | (calendar_year % 400 == 0))
+    return day - (leap & (day >= 59))
+
+
+def circular_smooth(values, bandwidth=SMOOTHING_DAYS):
+    """
+    Smooth values along axis 0 with a Gaussian kernel wrapped around the year, as one
+    FFT convolution over every other axis at once.
+    Args:
+        values (np.ndarray): (N_DAYS, ...) values per day.
+        bandwidth (float): Kernel standard deviation in days; 0 returns the values unchanged.
+    """
+    n = values.shape[0]
+    if bandwidth <= 0:
+        return values.astype(np.float64)
+    offset = np.arange(n)
+    distance = np.minimum(offset, n - offset)
+    kernel = np.exp(-0.5 * (distance / bandwidth) ** 2)
+    kernel /= kernel.sum()
+    spectrum = np.fft.rfft(values, axis=0) * np.fft.rfft(kernel).reshape((-1,) + (1,) * (values.ndim - 1))
+    return np.fft.irfft(spectrum, n=n, axis=0)
+
+
+class DailyPresence:
+    """
+    Boolean cube of coastal hurricane presence indexed by [year, calendar day, region, min category],
+    the daily counterpart of WeeklyPresence.
+    """
+
+    def __init__(self, cube, first_year):
+        self.cube = cube
+        self.first_year = first_year
+
+    @classmethod
+    def build(cls, df):
+        """
+        Args:
+            df (pd.DataFrame): Track table with 'year', 'timestamp', 'hurricane_id', 'category' and 'region'.
+        """
+        return cls(*coastal_presence_cube(df, calendar_day(df['timestamp'].to_numpy()), N_DAYS))
+
+    def daily_rates(self, start_year, end_year):
+        """
+        Share of the years in the range with a hurricane present, as a (days, regions, categories) array;
+        all zero for an empty range (end_year before start_year).
+        """
+        n_years = max(end_year - start_year + 1, 0)
+        if n_years == 0:
+            return np.zeros(self.cube.shape[1:])
+        lo = max(start_year - self.first_year, 0)
+        hi = max(min(end_year - self.first_year + 1, len(self.cube)), lo)
+        return self.cube[lo:hi].sum(axis=0) / n_years
+
+    def climatology(self, start_year, end_year, bandwidth=SMOOTHING_DAYS):
+        """
+        Kernel-smoothed daily occurrence rates of every region and category threshold.
+        Returns:
+            np.ndarray: (N_DAYS, PRESENCE_REGIONS, N_CATEGORIES) smoothed rates.
+        """
+        return circular_smooth(self.daily_rates(start_year, end_year), bandwidth)
+
+
+def climatology_table(climatology, regions, min_category=0):
+    """
+    Daily occurrence rates of some regions at one category threshold, for plotting.
+    Args:
+        climatology (np.ndarray): Output of DailyPresence.climatology.
+    Returns:
+        pd.DataFrame: 'Day' (1-365), 'Date' (e.g. 'Sep 10'), 'Region' and 'Rate', one row per day and region.
+    """
+    if min_category > N_CATEGORIES - 1:
+        climatology = np.zeros_like(climatology)
+    rates = climatology[:, :, min(max(min_category, 0), N_CATEGORIES - 1)]
+    dates = pd.date_range('2001-01-01', periods=N_DAYS).strftime('%b %d')
+    return pd.concat([
+        pd.DataFrame({'Day': np.arange(1, N_DAYS + 1), 'Date': dates, 'Region': region,
+                      'Rate': rates[:, _presence_region(region)]})
+        for region in regions
+    ], ignore_index=True)
+
+if __name__ == "__main__":
+    from track_cache import load_joined_points
+    df = load_joined_points()
+    start = time.perf_counter()
+    presence = WeeklyPresence.build(df)
+    print(f"cube {presence.cube.shape} built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # The cube answers exactly like the row-wise function
+    last_year = int(df['year'].max())
+    ranges = [(last_year - 9, last_year), (1950, 1999), (int(df['year'].min()), last_year), (1840, 1860)]
+    for start_year, end_year in ranges:
+        for region in ['Any', 'Atlantic', 'Gulf of Mexico', 'Both']:
+            for min_category in range(N_CATEGORIES):
+                expected = calculate_weekly_frequency(df, region, start_year, end_year, min_category)
+                result = presence.weekly_frequency(region, start_year, end_year, min_category)
+                pd.testing.assert_frame_equal(result, expected)
+    print(f"identical to calculate_weekly_frequency on {len(ranges) * 4 * N_CATEGORIES} queries")
+
+    # Batch API: every column matches its single-region call
+    regions, min_categories = ['Any', 'Atlantic', 'Gulf of Mexico'], [0, 1, 3]
+    for start_year, end_year in ranges:
+        batch = calculate_weekly_frequencies(df, regions, start_year, end_year, min_categories)
+        for region in regions:
+            for min_category in min_categories:
+                expected = calculate_weekly_frequency(df, region, start_year, end_year, min_category)
+                assert np.array_equal(batch[frequency_column(region, min_category, min_categories)], expected['Probability'])
+
+    # Bootstrap bounds: reproducible, and they bracket the point estimate
+    start_year, end_year = int(df['year'].min()), int(df['year'].max())
+    matrix = presence.presence('Any', start_year, end_year)
+    start = time.perf_counter()
+    lower, upper = bootstrap_weekly_probability(matrix, n_resamples=10_000, seed=42)
+    print(f"10,000 bootstrap resamples over {len(matrix)} years in {(time.perf_counter() - start) * 1000:.0f} ms")
+    again = bootstrap_weekly_probability(matrix, n_resamples=10_000, seed=42)
+    assert np.array_equal(lower, again[0]) and np.array_equal(upper, again[1])
+    estimate = matrix.mean(axis=0)
+    assert (lower <= estimate + 1e-6).all() and (estimate <= upper + 1e-6).all()
+
+    # Every 30-year window from the prefix sums equals its own query
+    start = time.perf_counter()
+    window_starts, trend = presence.window_trend('Atlantic', window=30, min_category=1)
+    print(f"{len(window_starts)} 30-year windows in {(time.perf_counter() - start) * 1000:.2f} ms")
+    for first, probabilities in zip(window_starts, trend):
+        assert np.array_equal(probabilities, presence.weekly_probability('Atlantic', first, first + 29, 1))
+
+    # Day-of-year climatology: FFT smoothing equals the direct circular convolution
+    start = time.perf_counter()
+    daily = DailyPresence.build(df)
+    print(f"daily cube {daily.cube.shape} built in {(time.perf_counter() - start) * 1000:.0f} ms")
+    rates = daily.daily_rates(1950, last_year)
+    start = time.perf_counter()
+    smoothed = daily.climatology(1950, last_year)
+    print(f"climatology of {rates.shape[1] * rates.shape[2]} series in {(time.perf_counter() - start) * 1000:.2f} ms")
+    offset = np.arange(N_DAYS)
+    kernel = np.exp(-0.5 * (np.minimum(offset, N_DAYS - offset) / SMOOTHING_DAYS) ** 2)
+    direct = sum(w * np.roll(rates[:, 2, 1], k) for k, w in enumerate(kernel / kernel.sum()))
+    assert np.allclose(smoothed[:, 2, 1], direct)
+    assert np.isclose(smoothed.sum(axis=0), rates.sum(axis=0)).all()
+    assert np.array_equal(circular_smooth(rates, 0), rates)
+    # Empty and reversed year ranges give zero rates, not inf or NaN
+    for start_year, end_year in [(2000, 1999), (2000, 1990)]:
+        assert not daily.climatology(start_year, end_year).any()
+        assert (climatology_table(daily.climatology(start_year, end_year), regions)['Rate'] == 0).all()
+
+    start_year, end_year = last_year - 29, last_year
+    start = time.perf_counter()
+    for region in regions:
+        calculate_weekly_frequency(df, region, start_year, end_year, 0)
+    separate_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    calculate_weekly_frequencies(df, regions, start_year, end_year)
+    batch_seconds = time.perf_counter() - start
+    print(f"three regions: {separate_seconds * 1000:.1f} ms in separate calls, "
+          f"{batch_seconds * 1000:.1f} ms in one batch ({separate_seconds / batch_seconds:.1f}x)")
+
+    start = time.perf_counter()
+    calculate_weekly_frequency(df, 'Atlantic', start_year, end_year, 1)
+    row_seconds = time.perf_counter() - start
+    repeats = 1000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        presence.weekly_probability('Atlantic', start_year, end_year, 1)
+    cube_seconds = (time.perf_counter() - start) / repeats
+    print(f"calculate_weekly_frequency: {row_seconds * 1000:.1f} ms, cube query: {cube_seconds * 1e6:.1f} us")
+
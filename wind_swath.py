@@ -0,0 +1,232 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import shapely
+from artifact_cache import CACHE_DIR, cache_path, write_parquet_atomic
+from coastal_county_matcher import coastal_county_store_key
+from county_locator import get_county_locator
+from hurdat2_reader import HURDAT2_FILE, RADII_COLUMNS, read_hurdat2, storm_content_digests
+
+WIND_THRESHOLDS = [34, 50, 64]
+# Bearings (degrees clockwise from north) spanned by the NE, SE, SW and NW quadrants
+QUADRANT_BEARINGS = [(0, 90), (90, 180), (180, 270), (270, 360)]
+NAUTICAL_MILES_PER_DEGREE = 60.0
+# Simplification tolerances in degrees (~1 km); far below the precision of the radii themselves
+SWATH_TOLERANCE = 0.01
+COUNTY_TOLERANCE = 0.005
+# Bump whenever the layout of the cached exposure table changes
+EXPOSURE_VERSION = 1
+
+
+def quadrant_polygons(latitude, longitude, radii, arc_points=8):
+    """
+    Wind-field polygon per fix from its four quadrant radii.
+    Args:
+        latitude (np.ndarray): Fix latitudes in degrees.
+        longitude (np.ndarray): Fix longitudes in degrees.
+        radii (np.ndarray): (n, 4) NE, SE, SW, NW radii in nautical miles (0 or NaN for none).
+        arc_points (int): Points along each quadrant arc.
+    Returns:
+        np.ndarray: (n, 4 * arc_points, 2) ring coordinates (lon, lat); fixes without
+                    wind at the threshold collapse onto their center.
+    """
+    bearings = np.concatenate([np.radians(np.linspace(a, b, arc_points)) for a, b in QUADRANT_BEARINGS])
+    radius = np.repeat(np.nan_to_num(radii), arc_points, axis=1) / NAUTICAL_MILES_PER_DEGREE
+    dy = radius * np.cos(bearings)
+    dx = radius * np.sin(bearings) / np.cos(np.radians(latitude))[:, None]
+    return np.stack([longitude[:, None] + dx, latitude[:, None] + dy], axis=-1)
+
+
+def storm_swaths(columns, threshold, arc_points=8):
+    """
+    Swath polygon per storm for one wind threshold. Each quadrant is swept on its own:
+    the convex hull of a quadrant's sector at one fix and the same sector at the next fix,
+    unioned over quadrants and fixes, so a quadrant without wind never widens the swath.
+    Args:
+        columns (dict): Output of hurdat2_reader.read_hurdat2.
+        threshold (int): One of WIND_THRESHOLDS.
+    Returns:
+        tuple: (np.ndarray, np.ndarray) storm ids and their simplified swaths
+               (storms that never reach the threshold are left out).
+    """
+    k = WIND_THRESHOLDS.index(threshold)
+    radii = np.stack([columns[c] for c in RADII_COLUMNS[4 * k:4 * k + 4]], axis=1)
+    rings = quadrant_polygons(columns['latitude'], columns['longitude'], radii, arc_points)
+    has_wind = np.nan_to_num(radii) > 0
+    storm_index = columns['storm_index']
+    center = np.stack([columns['longitude'], columns['latitude']], axis=-1)[:, None, :]
+    same_storm = storm_index[:-1] == storm_index[1:]
+    # Storms with a single fix have no pairs; their sectors are used alone
+    counts = np.bincount(storm_index)
+    single_fix = counts[storm_index] == 1
+
+    pieces, piece_storm = [], []
+    for q in range(len(QUADRANT_BEARINGS)):
+        # Sector of quadrant q: the fix center and its arc
+        sector = np.concatenate([center, rings[:, q * arc_points:(q + 1) * arc_points]], axis=1)
+        pair = np.flatnonzero(same_storm & (has_wind[:-1, q] | has_wind[1:, q]))
+        single = np.flatnonzero(has_wind[:, q] & single_fix)
+        pieces += [shapely.convex_hull(shapely.multipoints(np.concatenate([sector[pair], sector[pair + 1]], axis=1))),
+                   shapely.convex_hull(shapely.multipoints(sector[single]))]
+        piece_storm += [storm_index[pair], storm_index[single]]
+    pieces, piece_storm = np.concatenate(pieces), np.concatenate(piece_storm)
+
+    order = np.argsort(piece_storm, kind='stable')
+    pieces, piece_storm = pieces[order], piece_storm[order]
+    storms, starts = np.unique(piece_storm, return_index=True)
+    stops = np.append(starts[1:], len(pieces))
+    swaths = np.array([shapely.union_all(pieces[a:b]) for a, b in zip(starts, stops)], dtype=object)
+    storm_ids = columns['storm_id'][np.searchsorted(storm_index, storms)]
+    return storm_ids, shapely.simplify(swaths, SWATH_TOLERANCE)
+
+
+def simplified_counties(locator=None):
+    """Topology-preserving simplified county polygons and an STRtree over them."""
+    locator = get_county_locator() if locator is None else locator
+    geometries = shapely.simplify(locator.geometries, COUNTY_TOLERANCE, preserve_topology=True)
+    shapely.prepare(geometries)
+    return geometries, shapely.STRtree(geometries)
+
+
+def storm_exposure(columns, counties):
+    """
+    Maximum wind threshold each storm brought to each coastal county.
+    Args:
+        columns (dict): Output of hurdat2_reader.read_hurdat2.
+        counties (tuple): Output of simplified_counties.
+    Returns:
+        pd.DataFrame: 'storm_id', 'county' (index into the county store) and 'max_wind_kt'.
+    """
+    _, tree = counties
+    parts = []
+    for threshold in WIND_THRESHOLDS:
+        storm_ids, swaths = storm_swaths(columns, threshold)
+        storm_idx, county_idx = tree.query(swaths, predicate='intersects')
+        parts.append(pd.DataFrame({
+            'storm_id': storm_ids[storm_idx],
+            'county': county_idx.astype(np.int32),
+            'max_wind_kt': np.int16(threshold),
+        }))
+    exposure = pd.concat(parts)
+    return exposure.groupby(['storm_id', 'county'], as_index=False, sort=False)['max_wind_kt'].max()
+
+
+# Simplified counties of an exposure worker process, set once by _init_exposure_worker
+_worker_counties = None
+
+def _init_exposure_worker(counties):
+    global _worker_counties
+    _worker_counties = counties
+
+def _exposure_chunk(hurdat2_path, storm_ids):
+    return storm_exposure(read_hurdat2(hurdat2_path, storm_ids=storm_ids), _worker_counties)
+
+
+def compute_wind_exposure(hurdat2_path=HURDAT2_FILE, storm_ids=None, locator=None, workers=1, chunk_storms=200):
+    """
+    Per-storm, per-county maximum wind exposure from the HURDAT2 wind radii.
+    Args:
+        storm_ids (list or None): ATCF ids of the storms to compute. If None, every storm.
+        workers (int): Processes to spread the storms over; 1 computes in this process.
+        chunk_storms (int): Storms per worker task.
+    Returns:
+        pd.DataFrame: 'storm_id', 'county' and 'max_wind_kt', ordered by storm and county.
+    """
+    if storm_ids is None:
+        storm_ids = list(storm_content_digests(hurdat2_path))
+    if not len(storm_ids):
+        return pd.DataFrame({'storm_id': pd.Series(dtype=object), 'county': pd.Series(dtype=np.int32),
+                             'max_wind_kt': pd.Series(dtype=np.int16)})
+    counties = simplified_counties(locator)
+    if workers > 1:
+        chunks = [storm_ids[i:i + chunk_storms] for i in range(0, len(storm_ids), chunk_storms)]
+        # Workers get the county polygons once, through the initializer, not with every chunk
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_exposure_worker,
+                                 initargs=(counties,)) as executor:
+            parts = list(executor.map(_exposure_chunk, [hurdat2_path] * len(chunks), chunks))
+        exposure = pd.concat(parts)
+    else:
+        exposure = storm_exposure(read_hurdat2(hurdat2_path, storm_ids=storm_ids), counties)
+    return exposure.sort_values(['storm_id', 'county']).reset_index(drop=True)
+
+
+def load_wind_exposure(hurdat2_path=HURDAT2_FILE, county_shapefile='cb_2023_us_county_500k.shp',
+                       county_excel='coastline-counties-list.xlsx', cache_dir=CACHE_DIR, workers=1):
+    """
+    Per-county maximum wind exposure of every storm, cached per storm: only storms
+    whose HURDAT2 block is new or changed since the last call are recomputed.
+    Returns:
+        pd.DataFrame: 'storm_id', 'county', 'max_wind_kt' and the county columns of
+                      CountyLocator.county_columns, ordered by storm and county.
+    """
+    locator = get_county_locator(county_shapefile, county_excel)
+    key = f'{coastal_county_store_key(county_shapefile, county_excel)}-v{EXPOSURE_VERSION}'
+    path = cache_path('wind-exposure', key, cache_dir=cache_dir)
+    digests = storm_content_digests(hurdat2_path)
+    cached = pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame(
+        {'storm_id': [], 'storm_digest': [], 'county': [], 'max_wind_kt': []}
+    )
+    # Storms without exposure are recorded with county -1 so they are not recomputed either
+    current = cached['storm_digest'].isin(set(digests.values()))
+    known = set(cached.loc[current, 'storm_digest'])
+    stale = [storm_id for storm_id, digest in digests.items() if digest not in known]
+    if stale or not current.all():
+        cached = cached[current]
+        # A revision that only withdraws storms just drops their rows
+        if stale:
+            fresh = compute_wind_exposure(hurdat2_path, stale, locator, workers=workers)
+            fresh = pd.concat([fresh, pd.DataFrame({'storm_id': list(set(stale) - set(fresh['storm_id'])), 'county': -1})])
+            fresh['storm_digest'] = fresh['storm_id'].map(digests)
+            cached = pd.concat([cached, fresh])
+        cached = cached.astype({'county': np.int32, 'max_wind_kt': 'Int16'})
+        cached = cached.sort_values(['storm_id', 'county']).reset_index(drop=True)
+        write_parquet_atomic(cached, path)
+
+    exposure = cached[cached['county'] >= 0].reset_index(drop=True)
+    exposure = exposure[['storm_id', 'county', 'max_wind_kt']].astype({'storm_id': 'category', 'max_wind_kt': np.int16})
+    return pd.concat([exposure, locator.county_columns(exposure['county'].to_numpy())], axis=1)
+
+
+if __name__ == "__main__":
+    import tempfile
+    # Asymmetric storm without SW winds: a county only on its SW side gets no exposure
+    radii = {c: np.zeros(2) for c in RADII_COLUMNS}
+    for c in ['ne34', 'se34', 'nw34']:
+        radii[c] = np.full(2, 100.0)
+    columns = {'storm_index': np.zeros(2, dtype=np.int32), 'storm_id': np.array(['AL012000', 'AL012000']),
+               'latitude': np.array([30.0, 31.0]), 'longitude': np.array([-80.0, -80.0]), **radii}
+    southwest = shapely.box(-80.9, 29.3, -80.7, 29.5)
+    northeast = shapely.box(-79.3, 30.5, -79.1, 30.7)
+    test_counties = np.array([southwest, northeast])
+    test_exposure = storm_exposure(columns, (test_counties, shapely.STRtree(test_counties)))
+    assert test_exposure['county'].tolist() == [1], test_exposure
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for attempt in ['cold', 'warm']:
+            start = time.perf_counter()
+            exposure = load_wind_exposure(cache_dir=cache_dir)
+            print(f"{attempt} load: {len(exposure)} storm/county exposures in {time.perf_counter() - start:.2f}s")
+        # A revision that only withdraws a storm drops its rows without computing anything
+        with open(HURDAT2_FILE) as f:
+            lines = f.readlines()
+        last_header = max(i for i, line in enumerate(lines) if line[:2].isalpha())
+        withdrawn = lines[last_header].split(',')[0].strip()
+        revised = os.path.join(cache_dir, 'hurdat2-revised.txt')
+        with open(revised, 'w') as f:
+            f.writelines(lines[:last_header])
+        revised_exposure = load_wind_exposure(revised, cache_dir=cache_dir, workers=2)
+        assert withdrawn not in set(revised_exposure['storm_id'])
+        assert revised_exposure['storm_id'].nunique() == exposure['storm_id'].nunique() - (withdrawn in set(exposure['storm_id']))
+    print(exposure.groupby('max_wind_kt').size().rename('storm/county pairs'))
+    print(exposure.groupby('region', observed=True)['storm_id'].nunique().rename('storms with 34+ kt winds'))
+
+    for workers in [1, 2, 4]:
+        start = time.perf_counter()
+        result = compute_wind_exposure(workers=workers)
+        seconds = time.perf_counter() - start
+        if workers == 1:
+            expected = result
+        pd.testing.assert_frame_equal(result, expected)
+        print(f"workers={workers}: {seconds:.2f}s ({os.cpu_count()} CPUs)")